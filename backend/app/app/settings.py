@@ -89,6 +89,16 @@ DATABASES = {
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        # API requests run on a new thread each under ASGI, so their
+        # connections are closed after every request; consumer pool
+        # threads keep theirs open for CONSUMER_DB_CONN_MAX_AGE seconds,
+        # checking them before reusing them
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))),
+        "OPTIONS": {
+            "application_name": os.environ.get("DB_APPLICATION_NAME", "planning_poker"),
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
@@ -141,11 +151,77 @@ CORS_ALLOW_CREDENTIALS = True
 APPEND_SLASH = False
 
 
+# Comma separated Redis URLs of the channel layer, room groups and channels
+# are spread over several hosts by rendezvous hashing
+CHANNEL_REDIS_HOSTS = list(
+    filter(None, os.environ.get("CHANNEL_REDIS_HOSTS", "").split(","))
+) or [("redis", 6379)]
+
+# Channel layer backend, core.layers.HybridChannelLayer delivers room
+# broadcasts to the sockets of the same process directly
+CHANNEL_LAYER_BACKEND = os.environ.get(
+    "CHANNEL_LAYER_BACKEND", "core.layers.ShardedRedisChannelLayer"
+)
+
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": CHANNEL_LAYER_BACKEND,
         "CONFIG": {
-            "hosts": [("redis", 6379)],
+            "hosts": CHANNEL_REDIS_HOSTS,
         },
     },
 }
+
+# Seconds during which vote broadcasts of a room are batched, 0 disables batching
+VOTE_BROADCAST_WINDOW = float(os.environ.get("VOTE_BROADCAST_WINDOW", 0.05))
+
+# Seconds a voter stays online without a heartbeat
+PRESENCE_TIMEOUT = int(os.environ.get("PRESENCE_TIMEOUT", 60))
+
+# Hasher and work factor of room passwords, empty passwords are never hashed
+ROOM_PASSWORD_HASHER = os.environ.get(
+    "ROOM_PASSWORD_HASHER", "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+)
+ROOM_PASSWORD_ITERATIONS = int(os.environ.get("ROOM_PASSWORD_ITERATIONS", 0)) or None
+
+# Processes room passwords created in bulk are hashed on, all CPUs by default
+ROOM_PASSWORD_WORKERS = int(os.environ.get("ROOM_PASSWORD_WORKERS", 0)) or None
+
+# Key in the X-Api-Key header of create-rooms requests, staff users only if empty
+ROOM_PROVISIONING_KEY = os.environ.get("ROOM_PROVISIONING_KEY", "")
+
+# Seconds a signed room access token stays valid
+ROOM_TOKEN_MAX_AGE = int(os.environ.get("ROOM_TOKEN_MAX_AGE", 12 * 60 * 60))
+
+# Threads consumers run their queries on, each holding one persistent
+# connection, so a worker holds at most this many persistent connections
+# plus one per API request in progress
+CONSUMER_DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+
+# Seconds consumer pool threads keep their connection open for reuse
+CONSUMER_DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+# Seconds between recordings of activity in a room by one worker
+ROOM_ACTIVITY_INTERVAL = int(os.environ.get("ROOM_ACTIVITY_INTERVAL", 5 * 60))
+
+# Days after the last activity a room is deleted by cleanup_rooms
+ROOM_EXPIRY_DAYS = int(os.environ.get("ROOM_EXPIRY_DAYS", 30))
+
+# Record consumer metrics, served in the Prometheus text format at api/metrics
+METRICS_ENABLED = bool(int(os.environ.get("METRICS_ENABLED", 1)))
+
+# Key in the X-Api-Key header of metrics requests, staff users only if empty
+METRICS_KEY = os.environ.get("METRICS_KEY", "")
+
+# Actions per second and burst allowed per socket and per room in a worker
+SOCKET_RATE_LIMIT = float(os.environ.get("SOCKET_RATE_LIMIT", 5))
+SOCKET_RATE_BURST = int(os.environ.get("SOCKET_RATE_BURST", 10))
+ROOM_RATE_LIMIT = float(os.environ.get("ROOM_RATE_LIMIT", 50))
+ROOM_RATE_BURST = int(os.environ.get("ROOM_RATE_BURST", 100))
+
+# Largest inbound WebSocket frame in characters
+MAX_FRAME_SIZE = int(os.environ.get("MAX_FRAME_SIZE", 4096))
+
+# Comma separated WebSocket base URLs of the workers, e.g. ws://ws1:8000;
+# clients are told to connect all sockets of a room to the same one
+ROOM_WORKERS = list(filter(None, os.environ.get("ROOM_WORKERS", "").split(",")))
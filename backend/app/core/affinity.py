@@ -0,0 +1,35 @@
+"""
+Core room affinity.
+"""
+
+import hashlib
+
+from django.conf import settings
+
+
+def rendezvous(key, nodes):
+    """
+    Return the node a key belongs to by rendezvous hashing, so adding
+    or removing a node moves only the keys of that node.
+    """
+
+    def weight(node):
+        digest = hashlib.blake2b(f"{node}/{key}".encode(), digest_size=8)
+        return digest.digest()
+
+    return max(nodes, key=weight)
+
+
+def get_room_worker(room_id, workers=None):
+    """
+    Return the worker all sockets of a room should connect to, so room
+    broadcasts stay within one process, or None without ROOM_WORKERS.
+
+    Workers are chosen by rendezvous hashing, so adding or removing
+    a worker moves only the rooms of that worker.
+    """
+    workers = settings.ROOM_WORKERS if workers is None else workers
+    if not workers:
+        return None
+
+    return rendezvous(room_id, workers)
@@ -0,0 +1,40 @@
+"""
+Core permissions.
+"""
+
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+API_KEY_HEADER = "X-Api-Key"
+
+
+class StaffOrApiKey(BasePermission):
+    """
+    Allows staff users and requests sending the key held by the setting
+    named key_setting in the X-Api-Key header, nobody else when the key
+    is not set.
+    """
+
+    key_setting = None
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+
+        key = getattr(settings, self.key_setting)
+        sent = request.headers.get(API_KEY_HEADER, "")
+        return bool(key) and hmac.compare_digest(sent.encode(), key.encode())
+
+
+class CanProvisionRooms(StaffOrApiKey):
+    """Allows creating rooms in bulk with the ROOM_PROVISIONING_KEY."""
+
+    key_setting = "ROOM_PROVISIONING_KEY"
+
+
+class CanReadMetrics(StaffOrApiKey):
+    """Allows reading the worker metrics with the METRICS_KEY."""
+
+    key_setting = "METRICS_KEY"
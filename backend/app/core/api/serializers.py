@@ -4,39 +4,144 @@ Core serializers.
 
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
+from core.affinity import get_room_worker
+from core.decks import CUSTOM
 from core.models import (
     Room,
+    Round,
     Vote,
 )
+from core.tokens import check_room_token, check_voter_token, make_room_token
+
+
+class DeckChoiceSerializer(serializers.Serializer):
+    """Custom deck choice serializer."""
+
+    value = serializers.IntegerField(min_value=0)
+    label = serializers.CharField(max_length=10)
 
 
 class CreateRoomSerializer(serializers.ModelSerializer):
     """Room model serializer."""
 
+    custom_deck = DeckChoiceSerializer(
+        many=True, max_length=20, required=False, write_only=True
+    )
+
     class Meta:
         model = Room
-        fields = ["id", "password"]
+        fields = ["id", "password", "deck", "custom_deck"]
         read_only = ["id"]
         extra_kwargs = {"password": {"write_only": True, "max_length": 30}}
 
+    def validate(self, data):
+        """Object level validation."""
+        custom_deck = data.pop("custom_deck", [])
+
+        if data.get("deck") == CUSTOM:
+            values = [choice["value"] for choice in custom_deck]
+            if not values:
+                raise serializers.ValidationError(
+                    {"custom_deck": _("Custom deck requires at least one choice.")}
+                )
+            if len(set(values)) != len(values):
+                raise serializers.ValidationError(
+                    {"custom_deck": _("Custom deck values must be unique.")}
+                )
+            data["custom_deck"] = [
+                [choice["value"], choice["label"]] for choice in custom_deck
+            ]
+
+        return data
+
     def create(self, validated_data):
         """Return instance of Room model."""
         return Room.objects.create_room(**validated_data)
 
+    def to_representation(self, instance):
+        """
+        Return the room with a token granting access to it
+        and the worker its sockets should connect to.
+        """
+        data = super().to_representation(instance)
+        data["token"] = make_room_token(instance.id)
+        data["worker"] = get_room_worker(instance.id)
+        return data
+
+
+class BulkRoomSerializer(CreateRoomSerializer):
+    """Room of a bulk create serializer."""
+
+    voters = serializers.ListField(
+        child=serializers.CharField(max_length=20),
+        max_length=100,
+        required=False,
+        write_only=True,
+    )
+
+    class Meta(CreateRoomSerializer.Meta):
+        fields = [*CreateRoomSerializer.Meta.fields, "voters"]
+
+    def validate_voters(self, value):
+        """Validate voter names are unique within the room."""
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError(_("Voter names must be unique."))
+        return value
+
+
+class CreateRoomsSerializer(serializers.Serializer):
+    """Bulk create rooms serializer."""
+
+    rooms = BulkRoomSerializer(many=True, allow_empty=False, max_length=500)
+
+    def create(self, validated_data):
+        """Return the new rooms and votes."""
+        rooms, votes = Room.objects.create_rooms(validated_data["rooms"])
+        return {"rooms": rooms, "votes": votes}
+
+    def to_representation(self, instance):
+        """
+        Return every room with a token granting access to it and the worker
+        its sockets should connect to, and every voter with its own token.
+        """
+        voters = {room.id: [] for room in instance["rooms"]}
+        for vote in instance["votes"]:
+            voters[vote.room_id].append(
+                {
+                    "id": vote.id,
+                    "voter": vote.voter,
+                    "token": make_room_token(vote.room_id, vote.id, vote.voter),
+                }
+            )
+
+        return {
+            "rooms": [
+                {
+                    "id": str(room.id),
+                    "token": make_room_token(room.id),
+                    "worker": get_room_worker(room.id),
+                    "voters": voters[room.id],
+                }
+                for room in instance["rooms"]
+            ]
+        }
+
 
 class JoinRoomSerializer(serializers.ModelSerializer):
     """Vote model serializer."""
 
     room = serializers.CharField(allow_blank=False, write_only=True, required=True)
     password = serializers.CharField(
-        max_length=30, write_only=True, allow_blank=True, required=True
+        max_length=30, write_only=True, allow_blank=True, required=False
     )
+    token = serializers.CharField(write_only=True, required=False)
 
     class Meta:
         model = Vote
-        fields = ["id", "room", "password", "voter"]
+        fields = ["id", "room", "password", "token", "voter"]
         read_only = ["id"]
 
     def validate_room(self, value):
@@ -47,17 +152,72 @@ class JoinRoomSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"room": _("Room doesn't exists.")})
 
     def validate(self, data):
-        """Object level validation."""
+        """
+        Object level validation, accepting a valid room token
+        in place of the password without verifying it again.
+
+        A token of a voter of the room lets that voter join again under
+        its name to get a new token, once expired only with the password.
+        """
         room = data.get("room")
         password = data.pop("password", "")
-        voter = data.get("voter")
+        token = data.pop("token", None)
 
-        if not room.check_password(password):
+        if (
+            token is None or check_room_token(token, room.id) is None
+        ) and not room.check_password(password):
             raise serializers.ValidationError({"password": _("Invalid password.")})
 
-        if Vote.objects.filter(room=room, voter=voter).exists():
+        payload = check_voter_token(token, room.id) if token is not None else None
+        if payload is not None and payload["voter"] == data.get("voter"):
+            data["rejoined"] = Vote.objects.filter(
+                id=payload["vote"], room=room, voter=payload["voter"]
+            ).first()
+            if data["rejoined"] is None:
+                del data["rejoined"]
+
+        return data
+
+    def create(self, validated_data):
+        """
+        Return new instance of Vote model, relying on the unique
+        room voter constraint instead of checking the name first,
+        or the vote of a voter joining again.
+        """
+        if "rejoined" in validated_data:
+            return validated_data["rejoined"]
+
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError(
                 {"voter": _("This name is already reserved by another voter.")}
             )
 
+    def to_representation(self, instance):
+        """
+        Return the vote with a token granting its voter access to the room
+        and the worker the room sockets should connect to.
+        """
+        data = super().to_representation(instance)
+        data["token"] = make_room_token(instance.room_id, instance.id, instance.voter)
+        data["worker"] = get_room_worker(instance.room_id)
         return data
+
+
+class RoundSerializer(serializers.ModelSerializer):
+    """Round model serializer."""
+
+    class Meta:
+        model = Round
+        fields = [
+            "number",
+            "values",
+            "average",
+            "median",
+            "mode",
+            "agreement",
+            "revealed_at",
+        ]
+        read_only_fields = fields
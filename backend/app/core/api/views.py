@@ -2,12 +2,24 @@
 Core views.
 """
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from rest_framework import generics
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.views import APIView
 
+from core.api.permissions import CanProvisionRooms, CanReadMetrics
 from core.api.serializers import (
     CreateRoomSerializer,
+    CreateRoomsSerializer,
     JoinRoomSerializer,
+    RoundSerializer,
 )
+from core.consumers import notify_voter_joined
+from core.metrics import metrics
+from core.models import Round
+from core.tokens import check_room_token
 
 
 class CreateRoomAPIView(generics.CreateAPIView):
@@ -16,7 +28,61 @@ class CreateRoomAPIView(generics.CreateAPIView):
     serializer_class = CreateRoomSerializer
 
 
+class CreateRoomsAPIView(generics.CreateAPIView):
+    """Create many rooms with their voters at once API view."""
+
+    serializer_class = CreateRoomsSerializer
+    permission_classes = [CanProvisionRooms]
+
+
 class JoinRoomAPIView(generics.CreateAPIView):
     """Join existing room API view."""
 
     serializer_class = JoinRoomSerializer
+
+    def perform_create(self, serializer):
+        """Save the new voter and announce it to the room."""
+        vote = serializer.save()
+        if "rejoined" not in serializer.validated_data:
+            notify_voter_joined(vote)
+
+
+class RoomHistoryPagination(PageNumberPagination):
+    """Room history pagination."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class RoomHistoryAPIView(generics.ListAPIView):
+    """Revealed rounds of a room API view, newest first."""
+
+    serializer_class = RoundSerializer
+    pagination_class = RoomHistoryPagination
+
+    def get_queryset(self):
+        """Return the rounds of the room the request token grants access to."""
+        room_id = self.kwargs["room_id"]
+        if (
+            check_room_token(self.request.query_params.get("token", ""), room_id)
+            is None
+        ):
+            raise PermissionDenied("Invalid room token.")
+
+        return Round.objects.filter(room_id=room_id).order_by("-number")
+
+
+class MetricsAPIView(APIView):
+    """Metrics of this worker process in the Prometheus text format API view."""
+
+    permission_classes = [CanReadMetrics]
+
+    def get(self, request):
+        """Return the metrics, or not found if they are disabled."""
+        if not settings.METRICS_ENABLED:
+            raise Http404()
+
+        return HttpResponse(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -0,0 +1,32 @@
+"""
+Core benchmarks.
+
+Every benchmark is a run(options) callable returning a JSON-serializable
+dict of results, executed through the benchmark management command.
+"""
+
+from core.benchmarks import (
+    coalescing,
+    connect,
+    db_pool,
+    joins,
+    load,
+    passwords,
+    provisioning,
+    room_state,
+    serialization,
+    workers,
+)
+
+BENCHMARKS = {
+    "coalescing": coalescing.run,
+    "connect": connect.run,
+    "db_pool": db_pool.run,
+    "joins": joins.run,
+    "load": load.run,
+    "passwords": passwords.run,
+    "provisioning": provisioning.run,
+    "room_state": room_state.run,
+    "serialization": serialization.run,
+    "workers": workers.run,
+}
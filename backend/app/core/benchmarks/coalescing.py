@@ -0,0 +1,72 @@
+"""
+Vote broadcasts per round with and without coalescing.
+
+Every voter of a room votes at once, the benchmark reports how many
+group events were emitted and how many frames each client received,
+for the configured broadcast window and with batching disabled.
+"""
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import override_settings
+
+from core.benchmarks.utils import (
+    Timer,
+    benchmark_room,
+    in_memory_channel_layer,
+    receive_action,
+    room_communicator,
+)
+from core.metrics import metrics
+
+
+async def measure_round(room, votes):
+    """Let every voter vote at once and count the vote frames received."""
+    communicators = []
+    for vote in votes:
+        communicator = room_communicator(room.id, vote)
+        await communicator.connect()
+        communicators.append(communicator)
+
+    for communicator in communicators:
+        await receive_action(communicator, "refresh_votes")
+        while not await communicator.receive_nothing(timeout=0.05):
+            await communicator.receive_from()
+
+    before = {
+        name: metrics.get(f"vote_cast_{name}_total")
+        for name in ("changes", "coalesced", "broadcasts")
+    }
+    frames = 0
+    with Timer() as timer:
+        for communicator in communicators:
+            await communicator.send_json_to({"action": "vote", "value": 1})
+        for communicator in communicators:
+            voted = set()
+            while len(voted) < len(votes):
+                data = await receive_action(communicator, "vote_cast")
+                voted.update(vote["voter"] for vote in data["votes"])
+                frames += 1
+
+    for communicator in communicators:
+        await communicator.disconnect()
+
+    return {
+        name: metrics.get(f"vote_cast_{name}_total") - before[name] for name in before
+    } | {
+        "frames_per_client": frames / len(communicators),
+        "round_ms": timer.elapsed,
+    }
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+    results = {}
+
+    for window in (settings.VOTE_BROADCAST_WINDOW, 0):
+        with override_settings(VOTE_BROADCAST_WINDOW=window):
+            with benchmark_room(voters) as (room, votes), in_memory_channel_layer():
+                results[f"window_{window}"] = async_to_sync(measure_round)(room, votes)
+
+    return {"benchmark": "coalescing", "voters": voters, "results": results}
@@ -0,0 +1,82 @@
+"""
+Connection latency and messages generated per join.
+
+Connects sockets one by one to a room whose voters are already
+connected, reporting the latency, queries and frames of every join:
+the frames the joining socket receives and the frames it causes on
+the sockets already in the room.
+"""
+
+from asgiref.sync import async_to_sync
+
+from core.benchmarks.utils import (
+    QueryCounter,
+    Timer,
+    benchmark_room,
+    in_memory_channel_layer,
+    receive_action,
+    room_communicator,
+)
+
+
+async def drain(communicator):
+    """Receive every pending frame and return how many there were."""
+    frames = 0
+    while not await communicator.receive_nothing(timeout=0.01):
+        await communicator.receive_from()
+        frames += 1
+    return frames
+
+
+async def measure_joins(room, joins, counter):
+    """Connect the given number of sockets, measuring every join."""
+    joins_stats = []
+    communicators = []
+
+    for _ in range(joins):
+        communicator = room_communicator(room.id)
+        counter.reset()
+        with Timer() as timer:
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+        queries = counter.reset()
+
+        caused = 0
+        for other in communicators:
+            caused += await drain(other)
+
+        joins_stats.append(
+            {
+                "latency_ms": timer.elapsed,
+                "queries": queries,
+                "frames_received": 2 + await drain(communicator),
+                "frames_caused": caused,
+            }
+        )
+        communicators.append(communicator)
+
+    for communicator in communicators:
+        await communicator.disconnect()
+
+    return joins_stats
+
+
+def summarize(joins):
+    """Average the statistics of a list of joins."""
+    return {name: sum(join[name] for join in joins) / len(joins) for name in joins[0]}
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+
+    with benchmark_room(voters) as (room, _), in_memory_channel_layer():
+        with QueryCounter() as counter:
+            joins = async_to_sync(measure_joins)(room, voters, counter)
+
+    return {
+        "benchmark": "connect",
+        "voters": voters,
+        "first_join": joins[0],
+        "later_joins": summarize(joins[1:]) if len(joins) > 1 else None,
+    }
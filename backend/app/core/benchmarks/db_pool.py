@@ -0,0 +1,92 @@
+"""
+Vote throughput of many concurrent sockets.
+
+Connects the given number of sockets, one per voter, to rooms of the
+given number of voters and lets every socket vote at once, first with
+a single thread consumer database pool, the way every query shared one
+thread before, then with the configured pool size. Reports votes per
+second and the latency until every vote is acknowledged.
+"""
+
+import asyncio
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import override_settings
+
+from core.benchmarks.utils import (
+    Timer,
+    benchmark_room,
+    in_memory_channel_layer,
+    percentile,
+    receive_action,
+    room_communicator,
+)
+from core.models import Vote
+
+
+async def cast_vote(communicator, value):
+    """Vote and return the time until the vote was acknowledged."""
+    with Timer() as timer:
+        await communicator.send_json_to({"action": "vote", "value": value})
+        await receive_action(communicator, "message", timeout=60)
+    return timer.elapsed
+
+
+async def measure_votes(rooms, rounds):
+    """Let every socket of every room vote at once for the given rounds."""
+    communicators = []
+    for room, votes in rooms:
+        for vote in votes:
+            communicator = room_communicator(room.id, vote)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+            communicators.append(communicator)
+
+    latencies = []
+    with Timer() as total:
+        for round_number in range(rounds):
+            latencies += await asyncio.gather(
+                *(
+                    cast_vote(
+                        communicator,
+                        Vote.VALUE_CHOICES[round_number % len(Vote.VALUE_CHOICES)][0],
+                    )
+                    for communicator in communicators
+                )
+            )
+
+    for communicator in communicators:
+        await communicator.disconnect()
+
+    return {
+        "votes_per_second": len(latencies) / total.elapsed * 1000,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p99_ms": percentile(latencies, 99),
+    }
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+    room_count = max(1, options["sockets"] // voters)
+    pool_size = settings.CONSUMER_DB_POOL_SIZE
+    results = {}
+
+    with ExitStack() as stack, in_memory_channel_layer():
+        rooms = [stack.enter_context(benchmark_room(voters)) for _ in range(room_count)]
+
+        for size in dict.fromkeys((1, pool_size)):
+            with override_settings(CONSUMER_DB_POOL_SIZE=size):
+                results[f"pool_size_{size}"] = async_to_sync(measure_votes)(
+                    rooms, options["rounds"]
+                )
+
+    return {
+        "benchmark": "db_pool",
+        "sockets": room_count * voters,
+        "rooms": room_count,
+        "rounds": options["rounds"],
+        **results,
+    }
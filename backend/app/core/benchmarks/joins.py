@@ -0,0 +1,67 @@
+"""
+Concurrent joins to the same room.
+
+Every voter name is requested by several threads at once through the
+join-room API, so only the unique room voter constraint decides which
+request wins. Reports accepted and rejected joins, latency and
+throughput.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmarks.utils import (
+    Timer,
+    benchmark_room,
+    in_memory_channel_layer,
+    percentile,
+)
+from core.models import Vote
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+    attempts = options["attempts"]
+    url = reverse("join-room")
+    clients = threading.local()
+
+    with benchmark_room(0) as (room, _), in_memory_channel_layer():
+
+        def join(voter):
+            if not hasattr(clients, "client"):
+                clients.client = Client()
+            with Timer() as timer:
+                res = clients.client.post(
+                    url, {"room": str(room.id), "password": "", "voter": voter}
+                )
+            connections.close_all()
+            return res.status_code, timer.elapsed
+
+        names = [f"Voter{number}" for number in range(voters)] * attempts
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        with override_settings(ALLOWED_HOSTS=hosts), Timer() as total:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(join, names))
+
+        stored = Vote.objects.filter(room=room).count()
+
+    latencies = [elapsed for _, elapsed in results]
+    return {
+        "benchmark": "joins",
+        "voters": voters,
+        "attempts_per_voter": attempts,
+        "concurrency": options["concurrency"],
+        "accepted": sum(1 for code, _ in results if code == 201),
+        "rejected": sum(1 for code, _ in results if code == 400),
+        "stored_votes": stored,
+        "joins_per_second": len(results) / total.elapsed * 1000,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p99_ms": percentile(latencies, 99),
+    }
@@ -0,0 +1,173 @@
+"""
+Consumer load harness.
+
+Connects an admin socket and one socket per voter to each of the given
+number of rooms and runs vote, reveal and reset cycles in every room at
+once, one action after another so the queries of each action can be
+counted. Reports the broadcast latency from sending an action until
+every socket of the room has seen its result, the frames received per
+second and the database queries per action, on the in-memory or a Redis
+channel layer.
+"""
+
+import asyncio
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync
+
+from core.benchmarks.utils import (
+    QueryCounter,
+    Timer,
+    benchmark_channel_layer,
+    benchmark_room,
+    percentile,
+    receive_action,
+    room_communicator,
+)
+from core.models import Vote
+
+ACTIONS = ("vote", "reveal", "reset")
+
+
+async def receive_until(communicator, done, start, latencies):
+    """
+    Receive frames until done returns True for one, record the latency
+    since start and return the number of frames received.
+    """
+    frames = 0
+    while True:
+        data = await communicator.receive_json_from(timeout=60)
+        frames += 1
+        if done(data):
+            latencies.append((time.perf_counter() - start) * 1000)
+            return frames
+
+
+async def vote_phase(room, value, latencies):
+    """Let every voter of a room vote and wait until all sockets saw it."""
+    start = time.perf_counter()
+    for communicator in room["voters"]:
+        await communicator.send_json_to({"action": "vote", "value": value})
+
+    def done_for(voted):
+        def done(data):
+            if data["action"] == "vote_cast":
+                voted.update(vote["voter"] for vote in data["votes"] if vote["voted"])
+            return len(voted) == room["size"]
+
+        return done
+
+    frames = await asyncio.gather(
+        *(
+            receive_until(communicator, done_for(set()), start, latencies)
+            for communicator in room["all"]
+        )
+    )
+    return sum(frames)
+
+
+async def broadcast_phase(room, action, reply, latencies):
+    """Send an admin action to a room and wait until all sockets saw it."""
+    start = time.perf_counter()
+    await room["admin"].send_json_to({"action": action})
+
+    frames = await asyncio.gather(
+        *(
+            receive_until(
+                communicator, lambda data: data["action"] == reply, start, latencies
+            )
+            for communicator in room["all"]
+        )
+    )
+    return sum(frames)
+
+
+async def connect_room(room, votes):
+    """Connect the admin and voter sockets of a room."""
+    admin = room_communicator(room.id)
+    voters = [room_communicator(room.id, vote) for vote in votes]
+    for communicator in (admin, *voters):
+        await communicator.connect()
+        await receive_action(communicator, "refresh_votes")
+
+    return {
+        "admin": admin,
+        "voters": voters,
+        "all": [admin, *voters],
+        "size": len(votes),
+    }
+
+
+async def measure_load(rooms, rounds, counter):
+    """Run the cycles in every room and collect the samples of each action."""
+    connected = [await connect_room(room, votes) for room, votes in rooms]
+    latencies = {action: [] for action in ACTIONS}
+    queries = dict.fromkeys(ACTIONS, 0)
+    actions = dict.fromkeys(ACTIONS, 0)
+    frames = 0
+
+    counter.reset()
+    with Timer() as total:
+        for round_number in range(rounds):
+            phases = {
+                "vote": lambda room: vote_phase(
+                    room,
+                    Vote.VALUE_CHOICES[round_number % len(Vote.VALUE_CHOICES)][0],
+                    latencies["vote"],
+                ),
+                "reveal": lambda room: broadcast_phase(
+                    room, "reveal", "reveal_votes", latencies["reveal"]
+                ),
+                "reset": lambda room: broadcast_phase(
+                    room, "reset", "reset_votes", latencies["reset"]
+                ),
+            }
+            for action, phase in phases.items():
+                frames += sum(await asyncio.gather(*map(phase, connected)))
+                queries[action] += counter.reset()
+                actions[action] += sum(
+                    room["size"] if action == "vote" else 1 for room in connected
+                )
+
+    for room in connected:
+        for communicator in room["all"]:
+            await communicator.disconnect()
+
+    return {
+        "duration_ms": total.elapsed,
+        "messages_per_second": frames / total.elapsed * 1000,
+        "actions": {
+            action: {
+                "count": actions[action],
+                "queries_per_action": queries[action] / actions[action],
+                "latency_p50_ms": percentile(latencies[action], 50),
+                "latency_p99_ms": percentile(latencies[action], 99),
+            }
+            for action in ACTIONS
+        },
+    }
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+
+    with ExitStack() as stack:
+        rooms = [
+            stack.enter_context(benchmark_room(voters)) for _ in range(options["rooms"])
+        ]
+        stack.enter_context(
+            benchmark_channel_layer(options["layer"], options["redis_url"])
+        )
+        with QueryCounter() as counter:
+            results = async_to_sync(measure_load)(rooms, options["rounds"], counter)
+
+    return {
+        "benchmark": "load",
+        "layer": options["layer"],
+        "rooms": options["rooms"],
+        "voters": voters,
+        "rounds": options["rounds"],
+        **results,
+    }
@@ -0,0 +1,72 @@
+"""
+Join throughput per core.
+
+Joins a passwordless room, a password protected room and a password
+protected room with a room token from a single thread through the
+join-room API, so joins per second approximate the throughput of one
+core. Reports the throughput and latency of every case.
+"""
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmarks.utils import (
+    Timer,
+    benchmark_room,
+    in_memory_channel_layer,
+    percentile,
+)
+from core.tokens import make_room_token
+
+PASSWORD = "SamplePassword123"
+
+
+def measure(client, room, joins, **payload):
+    """Join the room the given number of times and return the results."""
+    url = reverse("join-room")
+    latencies = []
+
+    with Timer() as total:
+        for number in range(joins):
+            with Timer() as timer:
+                res = client.post(
+                    url, {"room": str(room.id), "voter": f"Voter{number}", **payload}
+                )
+            assert res.status_code == 201, res.data
+            latencies.append(timer.elapsed)
+
+    room.votes.all().delete()
+    return {
+        "joins_per_second": joins / total.elapsed * 1000,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p99_ms": percentile(latencies, 99),
+    }
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    joins = options["voters"] * options["attempts"]
+    client = Client()
+    hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+    with benchmark_room(0) as (room, _), in_memory_channel_layer():
+        with override_settings(ALLOWED_HOSTS=hosts):
+            passwordless = measure(client, room, joins, password="")
+
+            room.set_password(PASSWORD)
+            room.save()
+            protected = measure(client, room, joins, password=PASSWORD)
+
+            token = make_room_token(room.id)
+            with_token = measure(client, room, joins, token=token)
+
+    return {
+        "benchmark": "passwords",
+        "joins": joins,
+        "hasher": settings.ROOM_PASSWORD_HASHER,
+        "iterations": settings.ROOM_PASSWORD_ITERATIONS,
+        "passwordless": passwordless,
+        "password": protected,
+        "token": with_token,
+    }
@@ -0,0 +1,95 @@
+"""
+Room provisioning through the API.
+
+Creates the given number of password protected rooms with the given
+number of voters each, once with a create-room and a join-room request
+per room and voter and once with a single create-rooms request.
+Reports the elapsed time and the rooms created per second of both.
+"""
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.api.permissions import API_KEY_HEADER
+from core.benchmarks.utils import Timer, in_memory_channel_layer
+from core.models import Room
+
+PASSWORD = "SamplePassword123"
+
+
+def one_by_one(client, rooms, voters):
+    """Create every room and voter with a request of its own."""
+    for _ in range(rooms):
+        res = client.post(reverse("create-room"), {"password": PASSWORD})
+        assert res.status_code == 201, res.data
+        room = res.data
+        for number in range(voters):
+            res = client.post(
+                reverse("join-room"),
+                {"room": room["id"], "token": room["token"], "voter": f"Voter{number}"},
+            )
+            assert res.status_code == 201, res.data
+
+    return rooms
+
+
+def in_bulk(client, rooms, voters):
+    """Create all rooms and voters with a single request."""
+    payload = {
+        "rooms": [
+            {
+                "password": PASSWORD,
+                "voters": [f"Voter{number}" for number in range(voters)],
+            }
+            for _ in range(rooms)
+        ]
+    }
+    res = client.post(reverse("create-rooms"), payload, content_type="application/json")
+    assert res.status_code == 201, res.data
+    return len(res.data["rooms"])
+
+
+def measure(create, client, rooms, voters):
+    """Create the rooms, delete them again and return the results."""
+    existing = set(Room.objects.values_list("id", flat=True))
+    try:
+        with Timer() as timer:
+            created = create(client, rooms, voters)
+    finally:
+        Room.objects.exclude(id__in=existing).delete()
+
+    return {
+        "elapsed_ms": timer.elapsed,
+        "rooms_per_second": created / timer.elapsed * 1000,
+    }
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    rooms = options["rooms"]
+    voters = options["voters"]
+    key = "benchmark"
+    client = Client(headers={API_KEY_HEADER: key})
+    hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+    with (
+        in_memory_channel_layer(),
+        override_settings(ALLOWED_HOSTS=hosts, ROOM_PROVISIONING_KEY=key),
+    ):
+        # Warm the password pool up so process start-up is not measured.
+        measure(in_bulk, client, 2, 0)
+
+        results = {
+            "one_by_one": measure(one_by_one, client, rooms, voters),
+            "bulk": measure(in_bulk, client, rooms, voters),
+        }
+
+    return {
+        "benchmark": "provisioning",
+        "rooms": rooms,
+        "voters": voters,
+        "hasher": settings.ROOM_PASSWORD_HASHER,
+        "workers": settings.ROOM_PASSWORD_WORKERS,
+        **results,
+    }
@@ -0,0 +1,127 @@
+"""
+Database round-trips per consumer action.
+
+Runs every consumer action against a room and counts the queries it
+issues, next to the queries of the former per-broadcast query path.
+"""
+
+from asgiref.sync import async_to_sync
+from django.db.models import BooleanField, Case, Value, When
+
+from core.benchmarks.utils import (
+    QueryCounter,
+    Timer,
+    benchmark_room,
+    in_memory_channel_layer,
+    receive_action,
+    room_communicator,
+)
+from core.models import Room, Vote
+
+
+def legacy_vote_list(room, *fields):
+    """Query a room vote list the way the consumer did before room state."""
+    votes = (
+        Vote.objects.filter(room_id=room.id)
+        .annotate(
+            voted=Case(
+                When(value__isnull=True, then=Value(False)),
+                default=Value(True),
+                output_field=BooleanField(),
+            )
+        )
+        .values("voter", *fields, "voted")
+    )
+    return list(votes)
+
+
+def legacy_actions(room, votes):
+    """Run the legacy query sequence of every action once."""
+    vote = votes[0]
+    return {
+        "connect": lambda: (
+            Room.objects.filter(id=room.id).exists(),
+            legacy_vote_list(room),
+        ),
+        "vote": lambda: (
+            Vote.objects.get(id=vote.id).save(),
+            legacy_vote_list(room),
+        ),
+        "reveal": lambda: legacy_vote_list(room, "value"),
+        "reset": lambda: (
+            Vote.objects.filter(room_id=room.id).update(value=None),
+            legacy_vote_list(room),
+        ),
+    }
+
+
+async def measure_consumer(room, votes, rounds, counter):
+    """Drive one socket per voter through the given number of rounds."""
+    samples = {"connect": [], "vote": [], "reveal": [], "reset": []}
+    timings = {action: [] for action in samples}
+
+    communicators = []
+    for vote in votes:
+        communicator = room_communicator(room.id, vote)
+        counter.reset()
+        with Timer() as timer:
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+        samples["connect"].append(counter.reset())
+        timings["connect"].append(timer.elapsed)
+        communicators.append(communicator)
+
+    for round_number in range(rounds):
+        value = Vote.VALUE_CHOICES[round_number % len(Vote.VALUE_CHOICES)][0]
+        for communicator in communicators:
+            with Timer() as timer:
+                await communicator.send_json_to({"action": "vote", "value": value})
+                for receiver in communicators:
+                    await receive_action(receiver, "vote_cast")
+            samples["vote"].append(counter.reset())
+            timings["vote"].append(timer.elapsed)
+
+        for action, reply in (("reveal", "reveal_votes"), ("reset", "reset_votes")):
+            with Timer() as timer:
+                await communicators[0].send_json_to({"action": action})
+                for receiver in communicators:
+                    await receive_action(receiver, reply)
+            samples[action].append(counter.reset())
+            timings[action].append(timer.elapsed)
+
+    for communicator in communicators:
+        await communicator.disconnect()
+
+    return samples, timings
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+    rounds = options["rounds"]
+
+    with benchmark_room(voters) as (room, votes), in_memory_channel_layer():
+        with QueryCounter() as counter:
+            legacy = {}
+            for action, queries in legacy_actions(room, votes).items():
+                counter.reset()
+                queries()
+                legacy[action] = counter.reset()
+
+            samples, timings = async_to_sync(measure_consumer)(
+                room, votes, rounds, counter
+            )
+
+    return {
+        "benchmark": "room_state",
+        "voters": voters,
+        "rounds": rounds,
+        "actions": {
+            action: {
+                "legacy_queries": legacy[action],
+                "queries": sum(samples[action]) / len(samples[action]),
+                "latency_ms": sum(timings[action]) / len(timings[action]),
+            }
+            for action in samples
+        },
+    }
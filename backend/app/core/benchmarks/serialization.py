@@ -0,0 +1,79 @@
+"""
+Broadcast frame serialization per room size.
+
+Compares encoding a reveal frame in every consumer of a room, as the
+handlers used to, with encoding it once per group event and sharing
+the frame, for 10, 100 and 1000 sockets per room, and reports the
+size of the frame in every frame format.
+"""
+
+import json
+import uuid
+
+from core import encoding
+from core.benchmarks.utils import Timer
+from core.state import RoomState
+
+SOCKETS = (10, 100, 1000)
+BROADCASTS = 20
+
+
+def reveal_payload(state):
+    """Return a reveal frame payload of the room state."""
+    return {
+        "action": "reveal_votes",
+        "seq": state.version,
+        "message": "Votes have been revealed.",
+        "votes": state.get_final_vote_list(),
+    }
+
+
+def per_socket(state, sockets):
+    """Encode the frame in every consumer."""
+    for _ in range(BROADCASTS):
+        for _ in range(sockets):
+            json.dumps(reveal_payload(state))
+
+
+def once_per_group(state, sockets):
+    """Encode the frame once per group event and share it."""
+    for _ in range(BROADCASTS):
+        event_id = uuid.uuid4().hex
+        for _ in range(sockets):
+            state.get_frame(event_id, lambda: reveal_payload(state))
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    voters = options["voters"]
+    state = RoomState(
+        "benchmark", [(id, f"Voter{id}", id % 40 + 1) for id in range(voters)]
+    )
+    encoders = {"stdlib": None}
+    if encoding.orjson is not None:
+        encoders["orjson"] = encoding.orjson
+
+    results = {}
+    for sockets in SOCKETS:
+        with Timer() as timer:
+            per_socket(state, sockets)
+        results[sockets] = {"per_socket_ms": timer.elapsed / BROADCASTS}
+
+        for name, module in encoders.items():
+            orjson, encoding.orjson = encoding.orjson, module
+            try:
+                with Timer() as timer:
+                    once_per_group(state, sockets)
+            finally:
+                encoding.orjson = orjson
+            results[sockets][f"once_{name}_ms"] = timer.elapsed / BROADCASTS
+
+    return {
+        "benchmark": "serialization",
+        "voters": voters,
+        "frame_bytes": {
+            format: len(encoding.encode(reveal_payload(state), format))
+            for format in dict.fromkeys(encoding.SUBPROTOCOLS.values())
+        },
+        "sockets": results,
+    }
@@ -0,0 +1,136 @@
+"""
+Core benchmarks utilities.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.db.backends.utils import CursorWrapper
+from django.test import override_settings
+
+from core.models import Room, Vote
+from core.routing import websocket_urlpatterns
+from core.tokens import make_room_token
+
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+}
+
+
+class QueryCounter:
+    """
+    Counts database queries executed by any thread while active.
+
+    Consumers run their queries in worker threads with connections of
+    their own, so per-connection tools like CaptureQueriesContext miss
+    them; this wraps the cursor class instead.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        counter = self
+        execute = CursorWrapper._execute_with_wrappers
+
+        def counting_execute(self, *args, **kwargs):
+            counter.count += 1
+            return execute(self, *args, **kwargs)
+
+        self._execute = execute
+        CursorWrapper._execute_with_wrappers = counting_execute
+        return self
+
+    def __exit__(self, *exc_info):
+        CursorWrapper._execute_with_wrappers = self._execute
+
+    def reset(self):
+        """Return the current count and start counting from zero."""
+        count, self.count = self.count, 0
+        return count
+
+
+@contextmanager
+def benchmark_room(voters):
+    """Create a room with the given number of voters and delete it afterwards."""
+    room = Room.objects.create_room()
+    votes = Vote.objects.bulk_create(
+        Vote(room=room, voter=f"Voter{number}") for number in range(voters)
+    )
+    try:
+        yield room, votes
+    finally:
+        room.delete()
+
+
+@contextmanager
+def in_memory_channel_layer():
+    """Run consumers on the in-memory channel layer."""
+    with override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS):
+        yield
+
+
+@contextmanager
+def benchmark_channel_layer(layer, redis_url=None):
+    """
+    Run consumers on the in-memory channel layer, or on a Redis channel
+    layer for "redis", at the given URL or as configured in the settings.
+    """
+    if layer != "redis":
+        with in_memory_channel_layer():
+            yield
+    elif redis_url is None:
+        yield
+    else:
+        layers = {
+            "default": {
+                "BACKEND": settings.CHANNEL_LAYER_BACKEND,
+                "CONFIG": {"hosts": [redis_url]},
+            }
+        }
+        with override_settings(CHANNEL_LAYERS=layers):
+            yield
+
+
+def room_communicator(room_id, vote=None, subprotocols=None):
+    """
+    Return a not yet connected WebSocket communicator for a room,
+    with a room token bound to the given vote if there is one.
+    """
+    token = make_room_token(room_id, *((vote.id, vote.voter) if vote else ()))
+    return WebsocketCommunicator(
+        URLRouter(websocket_urlpatterns),
+        f"/ws/room/{room_id}?token={token}",
+        subprotocols=subprotocols,
+    )
+
+
+async def receive_action(communicator, action, timeout=5):
+    """Receive frames until one with the given action arrives and return it."""
+    while True:
+        data = await communicator.receive_json_from(timeout)
+        if data["action"] == action:
+            return data
+
+
+def percentile(samples, percent):
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = math.ceil(percent / 100 * len(ordered)) - 1
+    return ordered[max(0, min(index, len(ordered) - 1))]
+
+
+class Timer:
+    """Measures the elapsed wall time of a block in milliseconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = (time.perf_counter() - self.start) * 1000
@@ -0,0 +1,214 @@
+"""
+Vote rounds across several worker processes.
+
+Runs every room of the given number of voters on the given number of
+worker processes sharing a Redis channel layer, once with the sockets
+of each room spread over all workers and once with all of them on the
+worker the room affinity picks. Reports the broadcast latency from the
+start of a vote or reset until a socket has seen its result, and the
+frames received per second. Without a Redis server, --redis-url can
+point at any local Redis stand-in.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import CommandError
+from django.db import connections
+
+from core.affinity import get_room_worker
+from core.benchmarks.utils import (
+    benchmark_channel_layer,
+    benchmark_room,
+    percentile,
+    receive_action,
+    room_communicator,
+)
+from core.db import close_db_executor
+from core.models import Vote
+
+
+async def wait_voted(communicator, voters, start, latencies):
+    """Receive frames until every voter voted and return their number."""
+    voted = set()
+    frames = 0
+    while len(voted) < voters:
+        data = await communicator.receive_json_from(timeout=60)
+        frames += 1
+        if data["action"] == "vote_cast":
+            voted.update(vote["voter"] for vote in data["votes"] if vote["voted"])
+
+    latencies.append((time.time() - start) * 1000)
+    return frames
+
+
+async def wait_reset(communicator, start, latencies):
+    """Receive frames until the round was reset and return their number."""
+    frames = 0
+    while True:
+        data = await communicator.receive_json_from(timeout=60)
+        frames += 1
+        if data["action"] == "reset_votes":
+            latencies.append((time.time() - start) * 1000)
+            return frames
+
+
+async def run_worker(plan, rounds, barrier):
+    """Drive the sockets a worker holds through the rounds."""
+    sockets = []
+    for room, votes, room_voters, admin in plan:
+        voters = [room_communicator(room.id, vote) for vote in votes]
+        admin = room_communicator(room.id) if admin else None
+        for communicator in filter(None, (admin, *voters)):
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+        sockets.append((room_voters, voters, admin))
+
+    latencies = {"vote": [], "reset": []}
+    frames = 0
+
+    async def sync():
+        # Wait for the other workers without blocking the event loop.
+        await asyncio.to_thread(barrier.wait)
+        return time.time()
+
+    start = await sync()
+    for round_number in range(rounds):
+        value = Vote.VALUE_CHOICES[round_number % len(Vote.VALUE_CHOICES)][0]
+        for _, voters, _ in sockets:
+            for communicator in voters:
+                await communicator.send_json_to({"action": "vote", "value": value})
+        frames += sum(
+            await asyncio.gather(
+                *(
+                    wait_voted(communicator, room_voters, start, latencies["vote"])
+                    for room_voters, voters, _ in sockets
+                    for communicator in voters
+                )
+            )
+        )
+
+        start = await sync()
+        for _, _, admin in sockets:
+            if admin is not None:
+                await admin.send_json_to({"action": "reset"})
+        frames += sum(
+            await asyncio.gather(
+                *(
+                    wait_reset(communicator, start, latencies["reset"])
+                    for _, voters, _ in sockets
+                    for communicator in voters
+                )
+            )
+        )
+        start = await sync()
+
+    for _, voters, admin in sockets:
+        for communicator in filter(None, (admin, *voters)):
+            await communicator.disconnect()
+
+    return {"latencies": latencies, "frames": frames}
+
+
+def worker_main(plan, options, barrier, results):
+    """
+    Run a worker process, putting its results on the results queue,
+    or its error so the benchmark does not wait for it forever.
+    """
+    try:
+        with benchmark_channel_layer("redis", options["redis_url"]):
+            started = time.perf_counter()
+            result = async_to_sync(run_worker)(plan, options["rounds"], barrier)
+            result["elapsed"] = (time.perf_counter() - started) * 1000
+    except Exception as error:
+        barrier.abort()
+        result = {"error": repr(error)}
+    finally:
+        connections.close_all()
+
+    results.put(result)
+
+
+def plan_workers(rooms, workers, affinity):
+    """Return the rooms, votes and admin sockets each worker holds."""
+    plans = [[] for _ in range(workers)]
+    for room, votes in rooms:
+        if affinity:
+            worker = get_room_worker(room.id, range(workers))
+            plans[worker].append((room, votes, len(votes), True))
+        else:
+            for worker in range(workers):
+                plans[worker].append(
+                    (room, votes[worker::workers], len(votes), worker == 0)
+                )
+
+    return plans
+
+
+def measure(rooms, options, affinity):
+    """Run the rounds on the worker processes and merge their results."""
+    context = multiprocessing.get_context("fork")
+    workers = options["workers"]
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+
+    # Forked workers must open database connections and pool threads
+    # of their own.
+    connections.close_all()
+    close_db_executor()
+    processes = [
+        context.Process(target=worker_main, args=(plan, options, barrier, results))
+        for plan in plan_workers(rooms, workers, affinity)
+    ]
+    for process in processes:
+        process.start()
+    merged = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    errors = [result["error"] for result in merged if "error" in result]
+    if errors:
+        raise CommandError(f"A worker failed: {errors[0]}")
+
+    elapsed = max(result["elapsed"] for result in merged)
+    stats = {
+        "messages_per_second": sum(result["frames"] for result in merged)
+        / elapsed
+        * 1000
+    }
+    for action in ("vote", "reset"):
+        latencies = [
+            latency for result in merged for latency in result["latencies"][action]
+        ]
+        stats[f"{action}_latency_p50_ms"] = percentile(latencies, 50)
+        stats[f"{action}_latency_p99_ms"] = percentile(latencies, 99)
+
+    return stats
+
+
+def run(options):
+    """Run the benchmark and return its results."""
+    if options["layer"] != "redis":
+        raise CommandError("The workers benchmark needs --layer redis.")
+
+    with ExitStack() as stack:
+        rooms = [
+            stack.enter_context(benchmark_room(options["voters"]))
+            for _ in range(options["rooms"])
+        ]
+        results = {
+            "spread": measure(rooms, options, affinity=False),
+            "affinity": measure(rooms, options, affinity=True),
+        }
+
+    return {
+        "benchmark": "workers",
+        "workers": options["workers"],
+        "rooms": options["rooms"],
+        "voters": options["voters"],
+        "rounds": options["rounds"],
+        **results,
+    }
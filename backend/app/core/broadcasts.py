@@ -0,0 +1,84 @@
+"""
+Core broadcasts.
+"""
+
+import asyncio
+import uuid
+
+from django.conf import settings
+
+from core.metrics import metrics
+
+
+async def group_send(channel_layer, group, event):
+    """Send an event to a room group, recording the time the send took."""
+    with metrics.timer("group_send_seconds", type=event["type"]):
+        await channel_layer.group_send(group, event)
+    metrics.increment("group_send_total", type=event["type"])
+
+
+class RoomBroadcastCoalescer:
+    """
+    Batches room changes made within a time window into one group event.
+
+    The first change of a room opens a window of VOTE_BROADCAST_WINDOW
+    seconds, changes made until it closes are applied to the room state
+    and sent together. Counts received changes, changes coalesced into
+    an already pending event and emitted events.
+    """
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self._pending = {}
+
+    async def add(self, channel_layer, group, room_state, change):
+        """Queue a change for the room group, opening a window if needed."""
+        metrics.increment(f"{self.name}_changes_total")
+
+        pending = self._pending.get(group)
+        if pending is not None:
+            pending["changes"].append(change)
+            metrics.increment(f"{self.name}_coalesced_total")
+            return None
+
+        pending = self._pending[group] = {
+            "channel_layer": channel_layer,
+            "room_state": room_state,
+            "changes": [change],
+        }
+
+        window = settings.VOTE_BROADCAST_WINDOW
+        if window > 0:
+            pending["task"] = asyncio.create_task(self._flush_later(group, window))
+        else:
+            await self.flush(group)
+
+    async def _flush_later(self, group, window):
+        """Flush the room group changes when the window closes."""
+        await asyncio.sleep(window)
+        await self.flush(group)
+
+    async def flush(self, group):
+        """Apply and send the pending changes of the room group right away."""
+        pending = self._pending.pop(group, None)
+        if pending is None:
+            return None
+
+        task = pending.get("task")
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+        event_id = uuid.uuid4().hex
+        changes = pending["changes"]
+        pending["room_state"].apply(event_id, changes)
+
+        await group_send(
+            pending["channel_layer"],
+            group,
+            {"type": self.type, "event_id": event_id, "changes": changes},
+        )
+        metrics.increment(f"{self.name}_broadcasts_total")
+
+
+vote_casts = RoomBroadcastCoalescer("vote_cast", "vote_cast_message")
@@ -2,15 +2,97 @@
 Core consumers.
 """
 
+import asyncio
+import functools
 import json
+import time
+import uuid
+from urllib.parse import parse_qs
 
-from asgiref.sync import sync_to_async
-from django.db.models import Case, When, Value, BooleanField
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
 
-from core.models import Room, Vote
+from core.broadcasts import group_send, vote_casts
+from core.db import consumer_database_sync_to_async
+from core.decks import room_decks
+from core.encoding import SUBPROTOCOLS, encode, get_subprotocol
+from core.metrics import metrics
+from core.models import Room, Round, Vote
+from core.ratelimit import TokenBucket
+from core.state import RoomState, get_room_group_name, room_states
+from core.tokens import check_room_token
+
+ACTIONS = ("vote", "reveal", "reset", "snapshot", "heartbeat")
+
+# Actions broadcast to the whole room, limited per room as well
+ROOM_ACTIONS = ("vote", "reveal", "reset")
+
+
+@functools.lru_cache(maxsize=256)
+def get_vote_choices_frame(choices, format="json"):
+    """
+    Returns the encoded vote choices frame of a tuple of choices,
+    encoding each recently used tuple only once per process and frame
+    format, as custom decks make the tuples unbounded.
+    """
+    return encode(
+        {
+            "action": "get_vote_choices",
+            "vote_choices": [{"label": v_c[1], "value": v_c[0]} for v_c in choices],
+        },
+        format,
+    )
+
+
+# Encode the default choices at import so no connection pays for it
+get_vote_choices_frame(Vote.VALUE_CHOICES)
+
+
+def notify_voter_joined(vote):
+    """
+    Announces a new room voter to the consumers of the room.
+    """
+    change = {"kind": "join", "vote_id": vote.id, "voter": vote.voter}
+
+    async_to_sync(group_send)(
+        get_channel_layer(),
+        get_room_group_name(vote.room_id),
+        {
+            "type": "vote_cast_message",
+            "event_id": uuid.uuid4().hex,
+            "changes": [change],
+        },
+    )
+
+
+async def sweep_presence(channel_layer, room_state):
+    """
+    Announces the voters whose presence expired as offline every half
+    PRESENCE_TIMEOUT for as long as the room state is loaded, so voters
+    of workers that stopped go offline even where no voter heartbeats.
+    """
+    group = get_room_group_name(room_state.room_id)
+    while True:
+        await asyncio.sleep(settings.PRESENCE_TIMEOUT / 2)
+        for vote_id in room_state.get_expired_presence(time.time()):
+            changes = [
+                {
+                    "kind": "presence",
+                    "vote_id": vote_id,
+                    "voter": room_state.votes[vote_id]["voter"],
+                    "expires_at": None,
+                }
+            ]
+            event_id = uuid.uuid4().hex
+            room_state.apply(event_id, changes)
+            await group_send(
+                channel_layer,
+                group,
+                {"type": "presence_message", "event_id": event_id, "changes": changes},
+            )
 
 
 class PlanningPokerConsumer(AsyncWebsocketConsumer):
@@ -18,103 +100,186 @@ class PlanningPokerConsumer(AsyncWebsocketConsumer):
     Planning poker game consumer.
     """
 
-    @database_sync_to_async
-    def check_room_existing(self):
-        """
-        Checks if a room exists in the database
+    @consumer_database_sync_to_async
+    def load_room(self):
         """
-        try:
-            return Room.objects.filter(id=self.room_id).exists()
-        except ValidationError:
-            return False
+        Loads the room deck and votes with a single query, returning the
+        deck and a new room state, or None if the room does not exist.
 
-    @database_sync_to_async
-    def get_final_vote_list(self):
+        A room in a revealed round is loaded revealed only if its votes
+        still hold the values saved by the reveal, as later votes make
+        the reveal stale; that takes one more query.
         """
-        Retrieves a list of votes for a room with vote values.
-        """
-        votes = (
-            Vote.objects.filter(room_id=self.room_id)
-            .annotate(
-                voted=Case(
-                    When(value__isnull=True, then=Value(False)),
-                    default=Value(True),
-                    output_field=BooleanField(),
+        try:
+            rows = list(
+                Room.objects.filter(id=self.room_id)
+                .order_by("votes__id")
+                .values_list(
+                    "deck",
+                    "custom_deck",
+                    "round",
+                    "last_activity",
+                    "revealed_round",
+                    "votes__id",
+                    "votes__voter",
+                    "votes__value",
+                    "votes__round",
                 )
             )
-            .values("voter", "value", "voted")
-        )
-        return list(votes)
-
-    @database_sync_to_async
-    def get_hidden_vote_list(self):
-        """ "
-        Retrieves a list of votes for a room without vote
-        values but with information is already voted or not.
-        """
-        votes = (
-            Vote.objects.filter(room_id=self.room_id)
-            .annotate(
-                voted=Case(
-                    When(value__isnull=True, then=Value(False)),
-                    default=Value(True),
-                    output_field=BooleanField(),
-                )
+        except ValidationError:
+            return None
+
+        if not rows:
+            return None
+
+        deck_name, custom_deck, round, last_activity, revealed_round = rows[0][:5]
+        deck = Room(deck=deck_name, custom_deck=custom_deck).get_deck()
+        room_decks.set(self.room_id, deck)
+
+        # Values cast in previous rounds are kept as history only.
+        votes = [
+            (vote_id, voter, value if vote_round == round else None)
+            for *_, vote_id, voter, value, vote_round in rows
+            if vote_id is not None
+        ]
+
+        room_state = RoomState(self.room_id, votes, round)
+        room_state.touched_at = last_activity.timestamp()
+        if revealed_round == round:
+            revealed = (
+                Round.objects.filter(room_id=self.room_id, number=round)
+                .values_list("values", flat=True)
+                .first()
             )
-            .values("voter", "voted")
-        )
-        return list(votes)
+            values = {
+                vote["voter"]: vote["value"]
+                for vote in room_state.votes.values()
+                if vote["value"] is not None
+            }
+            if revealed == values:
+                room_state.reveal = {
+                    "votes": room_state.get_final_vote_list(),
+                    "stats": room_state.get_stats(),
+                }
+
+        return deck, room_state
 
-    @sync_to_async
-    def get_vote_choices(self):
+    @consumer_database_sync_to_async
+    def update_vote(self, id, value):
         """
-        Returns the available vote choices.
+        Update voter with specific id vote value in the room and
+        return the vote id and voter, or None if the room has no such vote.
         """
-        return [{"label": v_c[0], "value": v_c[1]} for v_c in Vote.VALUE_CHOICES]
+        return Vote.objects.cast_vote(self.room_id, id, value)
 
-    @database_sync_to_async
-    def update_vote(self, id, value):
+    @consumer_database_sync_to_async
+    def start_next_round(self):
         """
-        Update voter with specific id vote value.
+        Starts the next room round, leaving the values of previous rounds
+        in place, and returns its number or None if the room does not exist.
         """
-        vote = Vote.objects.get(id=id)
-        vote.value = value
-        vote.save()
+        return Room.objects.next_round(self.room_id)
+
+    @consumer_database_sync_to_async
+    def update_last_activity(self):
+        """Record activity in the room."""
+        return Room.objects.touch(self.room_id)
 
-    @database_sync_to_async
-    def reset_vote_values(self):
+    @consumer_database_sync_to_async
+    def save_round(self, number, votes, stats):
         """
-        Updates all room votes to set value to None.
+        Save the revealed values and statistics of a room round and mark
+        the round revealed, recording the room activity.
         """
-        Vote.objects.filter(room_id=self.room_id).update(value=None)
+        values = {vote["voter"]: vote["value"] for vote in votes if vote["voted"]}
+        Round.objects.save_round(self.room_id, number, values, stats)
+        return Room.objects.reveal_round(self.room_id, number)
 
+    @metrics.timed("consumer_action_seconds", action="connect")
     async def connect(self):
         """
-        Handles new WebSocket connections, ensuring
-        valid room access and initializing state.
+        Handles new WebSocket connections, ensuring valid room access
+        and initializing state. Access is granted by the signed room token
+        passed in the query string, which also binds the socket to the vote
+        of its voter, so it is verified without a query.
+
+        Clients choose the format of the frames sent to them through the
+        WebSocket subprotocol, JSON unless they ask for a compact one;
+        actions are always sent as JSON text frames.
         """
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
-        self.room_group_name = f"room_{self.room_id}"
+        self.room_group_name = get_room_group_name(self.room_id)
+        self.room_state = None
+        self.vote_id = None
+        self.voter = None
+        self.presence_announced_at = 0
+        self.rate_limit = TokenBucket(
+            settings.SOCKET_RATE_LIMIT, settings.SOCKET_RATE_BURST
+        )
+        self.rate_limited = False
 
-        if not await self.check_room_existing():
-            await self.accept()
-            await self.message(
-                {
-                    "code": "error",
-                    "message": f"Room does not exist",
-                }
-            )
-            await self.close(code=4001)
+        subprotocol = get_subprotocol(self.scope.get("subprotocols", ()))
+        self.format = SUBPROTOCOLS.get(subprotocol, "json")
+        await self.accept(subprotocol)
+
+        query = parse_qs(self.scope["query_string"].decode())
+        token = check_room_token(query.get("token", [""])[0], self.room_id)
+        if token is None:
+            await self.message({"code": "error", "message": "Invalid room token."})
+            await self.close(code=4003)
             return None
 
-        await self.accept()
+        # Join the group before reading the votes so no change made
+        # in between is missed; the snapshot is sent to this socket only.
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
 
-        vote_choices = await self.get_vote_choices()
-        await self.get_vote_choices_message({"vote_choices": vote_choices})
+        room_state = room_states.get(self.room_id)
+        self.deck = room_decks.get_cached(self.room_id)
+        if room_state is None or self.deck is None:
+            room = await self.load_room()
+            if room is None:
+                await self.channel_layer.group_discard(
+                    self.room_group_name, self.channel_name
+                )
+                await self.message(
+                    {
+                        "code": "error",
+                        "message": f"Room does not exist",
+                    }
+                )
+                await self.close(code=4001)
+                return None
+
+            # The last other socket of the room may have left meanwhile,
+            # dropping the state read before.
+            self.deck, loaded_state = room
+            room_state = room_states.get(self.room_id) or loaded_state
+
+        self.room_state = room_states.acquire(room_state)
+        if self.room_state.sweeper is None:
+            self.room_state.sweeper = asyncio.create_task(
+                sweep_presence(self.channel_layer, self.room_state)
+            )
 
-        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.refresh_votes()
+        if token["vote"] is not None:
+            self.vote_id = token["vote"]
+            self.voter = token["voter"]
+            self.room_state.sockets[self.vote_id] += 1
+
+            # The state was loaded before the join of this voter arrived.
+            if self.vote_id not in self.room_state.votes:
+                await self.broadcast_changes(
+                    "vote_cast_message",
+                    [{"kind": "join", "vote_id": self.vote_id, "voter": self.voter}],
+                )
+
+        await self.send_frame(
+            "get_vote_choices", get_vote_choices_frame(self.deck.choices, self.format)
+        )
+        await self.send_snapshot()
+        await self.touch_room()
 
+    @metrics.timed("consumer_action_seconds", action="disconnect")
     async def disconnect(self, close_code):
         """
         Cleans up on WebSocket disconnection,
@@ -122,123 +287,382 @@ class PlanningPokerConsumer(AsyncWebsocketConsumer):
         """
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
-    async def receive(self, text_data):
+        if self.room_state is not None:
+            if self.vote_id is not None:
+                self.room_state.sockets[self.vote_id] -= 1
+                if self.room_state.sockets[self.vote_id] <= 0:
+                    del self.room_state.sockets[self.vote_id]
+                    await self.broadcast_presence(self.vote_id, None)
+
+            room_states.release(self.room_id)
+            if self.room_id not in room_states:
+                # The deck is read again with the state by the next socket.
+                room_decks.invalidate(self.room_id)
+                self.room_state.sweeper.cancel()
+            self.room_state = None
+
+    async def receive(self, text_data=None, bytes_data=None):
         """
         Handles incoming messages from WebSocket,
-        routing actions based on message content.
+        routing actions based on message content
+        and recording the time each action took.
+
+        Binary frames close the socket as unsupported and frames above
+        MAX_FRAME_SIZE as too big, and actions beyond the socket or room
+        rate limit are dropped.
         """
-        text_data_json = json.loads(text_data)
-        action = text_data_json["action"]
+        if self.room_state is None:
+            return None
 
-        match action:
-            case "vote":
-                await self.vote(text_data_json)
-            case "reveal":
-                await self.reveal_votes()
-            case "reset":
-                await self.reset_votes()
-            case _:
-                await self.message({"code": "error", "message": "Something went wrong"})
+        if text_data is None:
+            metrics.increment("consumer_rejected_frames_total")
+            await self.close(code=1003)
+            return None
+
+        if len(text_data) > settings.MAX_FRAME_SIZE:
+            metrics.increment("consumer_rejected_frames_total")
+            await self.close(code=1009)
+            return None
+
+        try:
+            text_data_json = json.loads(text_data)
+            action = text_data_json["action"]
+            label = action if action in ACTIONS else "unknown"
+        except (ValueError, TypeError, KeyError):
+            metrics.increment("consumer_rejected_frames_total")
+            await self.message({"code": "error", "message": "Something went wrong"})
+            return None
+
+        if not await self.allow(label):
+            return None
+
+        with metrics.timer("consumer_action_seconds", action=label):
+            match action:
+                case "vote":
+                    await self.vote(text_data_json)
+                case "reveal":
+                    await self.reveal_votes()
+                case "reset":
+                    await self.reset_votes()
+                case "snapshot":
+                    await self.send_snapshot()
+                case "heartbeat":
+                    await self.heartbeat(text_data_json)
+                case _:
+                    await self.message(
+                        {"code": "error", "message": "Something went wrong"}
+                    )
+
+    async def allow(self, action):
+        """
+        Take the action from the socket and room rate limits and return
+        whether it may run, telling the client once when it may not.
+        """
+        scope = None
+        if not self.rate_limit.consume():
+            scope = "socket"
+        elif action in ROOM_ACTIONS and not self.room_state.rate_limit.consume():
+            scope = "room"
+
+        if scope is None:
+            self.rate_limited = False
+            return True
+
+        metrics.increment("consumer_rate_limited_total", scope=scope, action=action)
+        if not self.rate_limited:
+            self.rate_limited = True
+            await self.message(
+                {"code": "error", "message": "Too many actions, slow down."}
+            )
+        return False
 
     async def vote(self, data):
         """
-        Handle vote action from client, updating vote in database
-        and refresh votes list in all clients in the room.
+        Handle vote action from client, updating the vote the socket
+        is bound to in database and sending the changed vote
+        to all clients in the room.
         """
-        id = data["vote_id"]
-        value = data["value"]
+        value = data.get("value")
+
+        if self.vote_id is None:
+            await self.message({"code": "error", "message": "Only voters can vote."})
+            return None
 
-        await self.update_vote(id, value)
+        if value not in self.deck:
+            await self.message({"code": "error", "message": "Invalid vote value."})
+            return None
+
+        vote = await self.update_vote(self.vote_id, value)
+        if vote is None:
+            await self.message({"code": "error", "message": "Vote does not exist."})
+            return None
 
         await self.message({"code": "success", "message": "Successfully voted."})
+        await self.touch_room()
+
+        await vote_casts.add(
+            self.channel_layer,
+            self.room_group_name,
+            self.room_state,
+            {"kind": "vote", "vote_id": vote[0], "voter": vote[1], "value": value},
+        )
+
+    async def heartbeat(self, data):
+        """
+        Handle heartbeat action from client, keeping the voter
+        the socket is bound to online in the room.
+        """
+        if self.vote_id is None:
+            return None
 
-        await self.refresh_votes()
+        now = time.time()
+        timeout = settings.PRESENCE_TIMEOUT
 
-    async def refresh_votes(self):
-        """Refreshes votes for all clients in the room."""
-        votes = await self.get_hidden_vote_list()
+        # Other workers only need to hear again before the presence expires.
+        if now - self.presence_announced_at >= timeout / 2:
+            self.presence_announced_at = now
+            await self.broadcast_presence(self.vote_id, now + timeout)
 
-        await self.channel_layer.group_send(
-            self.room_group_name, {"type": "refresh_votes_message", "votes": votes}
+    async def broadcast_presence(self, vote_id, expires_at):
+        """
+        Sends a voter presence change to all clients in the room,
+        expires_at None meaning the voter went offline.
+        """
+        await self.broadcast_changes(
+            "presence_message",
+            [
+                {
+                    "kind": "presence",
+                    "vote_id": vote_id,
+                    "voter": self.room_state.votes[vote_id]["voter"],
+                    "expires_at": expires_at,
+                }
+            ],
         )
 
     async def reveal_votes(self):
-        """Refreshes votes with revealed values for all clients in the room."""
-        votes = await self.get_final_vote_list()
+        """
+        Refreshes votes with revealed values and the round statistics
+        for all clients in the room, saving the round to its history.
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "reveal_votes_message",
-                "message": "Votes have been revealed.",
-                "votes": votes,
-            },
+        A round revealed already and unchanged since is sent again
+        to this client only, from the room state.
+        """
+        await vote_casts.flush(self.room_group_name)
+
+        if self.room_state.reveal is not None:
+            await self.send_reveal(self.room_state.reveal, self.room_state.version)
+            return None
+
+        round = self.room_state.round
+        votes = self.room_state.get_final_vote_list()
+        stats = self.room_state.get_stats()
+
+        # Applying the reveal first turns reveals racing this one into resends.
+        await self.broadcast_changes(
+            "reveal_votes_message",
+            [{"kind": "reveal", "votes": votes, "stats": stats}],
         )
 
+        await self.save_round(round, votes, stats)
+        # Marking the round revealed recorded the room activity already.
+        self.room_state.touched_at = time.time()
+
     async def reset_votes(self):
         """
-        Updating all votes to value=None and refresh votes for all clients in the room.
+        Starting the next round and refresh votes for all clients in the room.
         """
-        await self.reset_vote_values()
+        round = await self.start_next_round()
+        if round is None:
+            await self.message({"code": "error", "message": "Room does not exist."})
+            return None
+
+        # Starting the round recorded the room activity already.
+        self.room_state.touched_at = time.time()
 
-        votes_list = await self.get_hidden_vote_list()
+        await vote_casts.flush(self.room_group_name)
+
+        await self.broadcast_changes(
+            "reset_votes_message",
+            [{"kind": "reset", "round": round}],
+            message="Votes have been reset.",
+        )
 
-        await self.channel_layer.group_send(
+    async def touch_room(self):
+        """
+        Records activity in the room unless this process
+        did so within the last ROOM_ACTIVITY_INTERVAL.
+        """
+        now = time.time()
+        if now - self.room_state.touched_at >= settings.ROOM_ACTIVITY_INTERVAL:
+            self.room_state.touched_at = now
+            await self.update_last_activity()
+
+    async def broadcast_changes(self, type, changes, **fields):
+        """
+        Applies changes to the room state and sends them
+        to all clients in the room, including other workers.
+        """
+        event_id = uuid.uuid4().hex
+        self.room_state.apply(event_id, changes)
+
+        await group_send(
+            self.channel_layer,
             self.room_group_name,
-            {
-                "type": "reset_votes_message",
-                "message": "Votes have been reset.",
-                "votes": votes_list,
-            },
+            {"type": type, "event_id": event_id, "changes": changes, **fields},
         )
 
+    def apply_event(self, event):
+        """
+        Applies the changes carried by a group event to the room state
+        and returns the sequence number the client should see for it,
+        or None if the event did not change anything the client shows.
+        """
+        if "changes" in event:
+            return self.room_state.apply(event["event_id"], event["changes"])
+        return self.room_state.version
+
     async def message(self, event):
         """Handles the message, forwarding it to the client."""
         code = event["code"]
         message = event["message"]
 
-        await self.send(
-            text_data=json.dumps(
-                {"action": "message", "code": code, "message": message}
-            )
+        await self.send_frame(
+            "message",
+            encode(
+                {"action": "message", "code": code, "message": message}, self.format
+            ),
         )
 
-    async def get_vote_choices_message(self, event):
-        """Handles the get choices message, forwarding it to the client."""
-        vote_choices = event["vote_choices"]
+    async def send_frame(self, action, frame):
+        """
+        Sends an encoded frame to the client, as a binary frame if it was
+        encoded to bytes, counting frames and bytes per action; frames of
+        a group event divided by its sends give its fan-out.
+        """
+        binary = isinstance(frame, bytes)
+        metrics.increment("consumer_frames_total", action=action)
+        metrics.increment(
+            "consumer_frame_bytes_total",
+            len(frame) if binary or frame.isascii() else len(frame.encode()),
+            action=action,
+        )
+        if binary:
+            await self.send(bytes_data=frame)
+        else:
+            await self.send(text_data=frame)
 
-        await self.send(
-            text_data=json.dumps(
-                {"action": "get_vote_choices", "vote_choices": vote_choices}
-            )
+    async def send_snapshot(self):
+        """
+        Sends the full votes snapshot to this client only, encoding
+        it once per room state version for all clients asking, followed
+        by the revealed votes if the round was revealed.
+        """
+
+        def build():
+            return {
+                "action": "refresh_votes",
+                "seq": self.room_state.version,
+                "votes": self.room_state.get_hidden_vote_list(),
+            }
+
+        await self.send_frame(
+            "refresh_votes",
+            self.room_state.get_frame(
+                ("snapshot", self.room_state.version), build, self.format
+            ),
         )
 
-    async def refresh_votes_message(self, event):
-        """Handles the refresh votes message, forwarding it to the client."""
-        votes = event["votes"]
+        if self.room_state.reveal is not None:
+            await self.send_reveal(self.room_state.reveal, self.room_state.version)
 
-        await self.send(
-            text_data=json.dumps({"action": "refresh_votes", "votes": votes})
+    async def send_reveal(self, reveal, seq):
+        """
+        Sends the revealed votes and statistics of the round to this client,
+        encoding them once per sequence number for all clients.
+        """
+
+        def build():
+            return {
+                "action": "reveal_votes",
+                "seq": seq,
+                "message": "Votes have been revealed.",
+                "votes": reveal["votes"],
+                "stats": reveal["stats"],
+            }
+
+        await self.send_frame(
+            "reveal_votes",
+            self.room_state.get_frame(("reveal", seq), build, self.format),
+        )
+
+    async def vote_cast_message(self, event):
+        """Handles the vote cast message, forwarding the changed votes."""
+        if self.room_state is None:
+            return None
+
+        seq = self.apply_event(event)
+
+        def build():
+            voted = {
+                change["voter"]: change.get("value") is not None
+                for change in event["changes"]
+            }
+            votes = [{"voter": voter, "voted": voted[voter]} for voter in voted]
+            return {"action": "vote_cast", "seq": seq, "votes": votes}
+
+        await self.send_frame(
+            "vote_cast",
+            self.room_state.get_frame(event["event_id"], build, self.format),
         )
 
     async def reveal_votes_message(self, event):
         """Handles the reveal votes message, forwarding it to the client."""
-        message = event["message"]
-        votes = event["votes"]
+        if self.room_state is None:
+            return None
 
-        await self.send(
-            text_data=json.dumps(
-                {"action": "reveal_votes", "message": message, "votes": votes}
-            )
-        )
+        seq = self.apply_event(event)
+        await self.send_reveal(event["changes"][0], seq)
 
     async def reset_votes_message(self, event):
         """Handles the reset votes message, forwarding it to the client."""
-        message = event["message"]
-        votes = event["votes"]
+        if self.room_state is None:
+            return None
 
-        await self.send(
-            text_data=json.dumps(
-                {"action": "reset_votes", "message": message, "votes": votes}
-            )
+        seq = self.apply_event(event)
+
+        def build():
+            return {
+                "action": "reset_votes",
+                "seq": seq,
+                "round": event["changes"][0]["round"],
+                "message": event["message"],
+                "votes": self.room_state.get_hidden_vote_list(),
+            }
+
+        await self.send_frame(
+            "reset_votes",
+            self.room_state.get_frame(event["event_id"], build, self.format),
+        )
+
+    async def presence_message(self, event):
+        """Handles the presence message, forwarding presence changes."""
+        if self.room_state is None:
+            return None
+
+        seq = self.apply_event(event)
+        if seq is None:
+            return None
+
+        def build():
+            change = event["changes"][0]
+            return {
+                "action": "presence",
+                "seq": seq,
+                "voter": change["voter"],
+                "online": change["expires_at"] is not None,
+            }
+
+        await self.send_frame(
+            "presence", self.room_state.get_frame(event["event_id"], build, self.format)
         )
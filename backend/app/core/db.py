@@ -0,0 +1,92 @@
+"""
+Core consumer database access.
+"""
+
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+from django.db import connections
+
+from core.metrics import metrics
+
+_executor = None
+
+
+def keep_connections_open():
+    """
+    Keep the connections of the current thread open for
+    CONSUMER_DB_CONN_MAX_AGE seconds instead of closing them after use.
+
+    API requests run on a new thread each under ASGI, so only the
+    long-lived consumer pool threads can reuse a connection.
+    """
+    for connection in connections.all():
+        connection.settings_dict = {
+            **connection.settings_dict,
+            "CONN_MAX_AGE": settings.CONSUMER_DB_CONN_MAX_AGE,
+        }
+
+
+def get_db_executor():
+    """
+    Return the thread pool consumers run their queries on, created
+    on first use with CONSUMER_DB_POOL_SIZE threads keeping their
+    connections open.
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CONSUMER_DB_POOL_SIZE,
+            thread_name_prefix="consumer-db",
+            initializer=keep_connections_open,
+        )
+    return _executor
+
+
+def close_db_executor():
+    """
+    Shut the consumer database pool down, to be recreated on next use,
+    closing the connections its threads keep open first.
+    """
+    global _executor
+
+    if _executor is not None:
+        # Every thread waits for the others, so each runs exactly one close.
+        threads = len(_executor._threads)
+        if threads:
+            barrier = threading.Barrier(threads)
+
+            def close_connections():
+                barrier.wait()
+                connections.close_all()
+
+            for _ in range(threads):
+                _executor.submit(close_connections)
+
+        _executor.shutdown()
+        _executor = None
+
+
+def consumer_database_sync_to_async(func):
+    """
+    Like database_sync_to_async, but runs the function on the consumer
+    database pool instead of the single thread sync code shares.
+
+    Each pool thread keeps its own connection, reused across calls
+    for CONSUMER_DB_CONN_MAX_AGE seconds, so the pool size bounds both the queries
+    consumers run at once and the connections they hold. The time of each
+    call, including the wait for a free thread, is recorded per function.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with metrics.timer("consumer_db_seconds", query=func.__name__):
+            return await DatabaseSyncToAsync(
+                func, thread_sensitive=False, executor=get_db_executor()
+            )(*args, **kwargs)
+
+    return wrapper
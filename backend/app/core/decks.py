@@ -0,0 +1,114 @@
+"""
+Core estimation decks.
+"""
+
+import uuid
+from collections import OrderedDict
+
+from django.utils.translation import gettext_lazy as _
+
+
+FIBONACCI = "fibonacci"
+TSHIRT = "tshirt"
+POWERS_OF_TWO = "powers_of_two"
+CUSTOM = "custom"
+
+# Room decks a process keeps in memory
+ROOM_DECK_CACHE_SIZE = 1024
+
+DECK_CHOICES = (
+    (FIBONACCI, _("Fibonacci")),
+    (TSHIRT, _("T-shirt sizes")),
+    (POWERS_OF_TWO, _("Powers of two")),
+    (CUSTOM, _("Custom")),
+)
+
+DECKS = {
+    FIBONACCI: (
+        (1, "1"),
+        (2, "2"),
+        (3, "3"),
+        (5, "5"),
+        (8, "8"),
+        (13, "13"),
+        (20, "20"),
+        (40, "40"),
+    ),
+    TSHIRT: (
+        (1, "XS"),
+        (2, "S"),
+        (3, "M"),
+        (5, "L"),
+        (8, "XL"),
+        (13, "XXL"),
+    ),
+    POWERS_OF_TWO: (
+        (1, "1"),
+        (2, "2"),
+        (4, "4"),
+        (8, "8"),
+        (16, "16"),
+        (32, "32"),
+        (64, "64"),
+    ),
+}
+
+
+class Deck:
+    """Estimation deck, the (value, label) vote choices of a room."""
+
+    def __init__(self, choices):
+        self.choices = tuple((value, label) for value, label in choices)
+        self.values = frozenset(value for value, _ in self.choices)
+
+    def __contains__(self, value):
+        """
+        Return whether value is a valid vote of the deck, only integers
+        being, so floats, booleans and unhashable client values are not.
+        """
+        return type(value) is int and value in self.values
+
+
+class RoomDeckCache:
+    """
+    Process-wide cache of room decks.
+
+    A room deck is read from the database with the room state and then
+    served from memory until the room is saved or deleted in this process
+    or its state is dropped. Only the maxsize most recently used decks
+    are kept, as rooms deleted by other processes are never invalidated.
+    """
+
+    def __init__(self, maxsize=ROOM_DECK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._decks = OrderedDict()
+
+    def _key(self, room_id):
+        try:
+            return uuid.UUID(str(room_id))
+        except ValueError:
+            return None
+
+    def get_cached(self, room_id):
+        """Return the cached deck of a room or None."""
+        key = self._key(room_id)
+        deck = self._decks.get(key)
+        if deck is not None:
+            self._decks.move_to_end(key)
+        return deck
+
+    def set(self, room_id, deck):
+        """Cache the deck of a room read by another query."""
+        key = self._key(room_id)
+        if key is not None:
+            self._decks[key] = deck
+            self._decks.move_to_end(key)
+            if len(self._decks) > self.maxsize:
+                self._decks.popitem(last=False)
+
+    def invalidate(self, room_id):
+        """Drop the cached deck of a room."""
+        self._decks.pop(self._key(room_id), None)
+
+
+room_decks = RoomDeckCache()
@@ -0,0 +1,70 @@
+"""
+Core encoding.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack comes with channels_redis
+    msgpack = None
+
+# Frame formats by the WebSocket subprotocol a client asks for
+SUBPROTOCOLS = {
+    "poker.json": "json",
+    "poker.compact": "compact",
+    **({"poker.msgpack": "msgpack"} if msgpack is not None else {}),
+}
+
+
+def dumps(data):
+    """Serialize data to a JSON text frame, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, separators=(",", ":"))
+
+
+def columnar(data):
+    """
+    Return the payload with every field holding a list of objects with
+    the same keys turned into an object of equal length value lists,
+    so the keys are sent once instead of once per entry.
+    """
+    result = {}
+    for name, value in data.items():
+        if (
+            isinstance(value, list)
+            and value
+            and all(isinstance(row, dict) for row in value)
+            and all(row.keys() == value[0].keys() for row in value)
+        ):
+            value = {key: [row[key] for row in value] for key in value[0]}
+        result[name] = value
+    return result
+
+
+def encode(data, format="json"):
+    """
+    Encode a payload in a frame format: JSON text, columnar JSON text
+    for "compact" or columnar MessagePack bytes for "msgpack".
+    """
+    if format == "json":
+        return dumps(data)
+    if format == "msgpack":
+        return msgpack.packb(columnar(data))
+    return dumps(columnar(data))
+
+
+def get_subprotocol(subprotocols):
+    """
+    Return the first of the WebSocket subprotocols a client asked for
+    that is supported, or None to use the default JSON frames.
+    """
+    return next(
+        (protocol for protocol in subprotocols if protocol in SUBPROTOCOLS), None
+    )
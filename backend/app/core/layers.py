@@ -0,0 +1,164 @@
+"""
+Core channel layers.
+"""
+
+import contextvars
+import json
+from collections import defaultdict
+
+from channels_redis.core import RedisChannelLayer
+
+from core.affinity import rendezvous
+
+# Channel the current task receives on
+receiving = contextvars.ContextVar("receiving", default=None)
+# Channels the current group send delivered to in process
+delivered = contextvars.ContextVar("delivered", default=())
+
+# Key marking messages this process sent to its own channels through Redis
+PENDING_KEY = "__hybrid_pending__"
+
+
+class ShardedRedisChannelLayer(RedisChannelLayer):
+    """
+    Redis channel layer placing groups and channels on its hosts by
+    rendezvous hashing.
+
+    The layer of channels_redis splits a fixed range of hash slots evenly
+    over its hosts, so adding a fifth host to four moves about half of
+    the groups. Here adding or removing a host moves only the groups and
+    channels of that host, as each host is weighed by its address rather
+    than its position in the list.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.host_keys = [
+            host.get("address") or json.dumps(host, sort_keys=True, default=str)
+            for host in self.hosts
+        ]
+
+    def consistent_hash(self, value):
+        if self.ring_size == 1:
+            return 0
+        if isinstance(value, bytes):
+            value = value.decode()
+
+        return self.host_keys.index(rendezvous(value, self.host_keys))
+
+
+class HybridChannelLayer(ShardedRedisChannelLayer):
+    """
+    Redis channel layer delivering group messages to the channels of its
+    own process directly.
+
+    Group members are still kept in Redis, so other processes reach them,
+    but a group send puts the message straight on the receive buffer of
+    every member in this process and goes through Redis only for the
+    members of other processes. Members in the process share the sent
+    message, so it must not be changed once sent.
+
+    The one channel blocked reading the process queue from Redis for all
+    others would not see its buffer until the next Redis message, so it
+    is sent to through Redis. To keep the messages of a channel in order,
+    it is then sent to through Redis until every such message was read
+    back, as they are marked for this process. Messages sent to a single
+    channel with send() always go through Redis, so their order relative
+    to group messages is not kept.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Channels of this process by group
+        self.local_groups = defaultdict(set)
+        # Channel reading the process queue from Redis
+        self.reading_channel = None
+        # Messages sent to channels of this process through Redis, not yet read
+        self.pending = defaultdict(int)
+
+    def is_local(self, channel):
+        """Return whether the channel belongs to this process."""
+        return f"{self.client_prefix}!" in channel
+
+    async def group_add(self, group, channel):
+        await super().group_add(group, channel)
+        if self.is_local(channel):
+            self.local_groups[group].add(channel)
+
+    async def group_discard(self, group, channel):
+        members = self.local_groups.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                del self.local_groups[group]
+        await super().group_discard(group, channel)
+
+    async def group_send(self, group, message):
+        members = {
+            channel
+            for channel in self.local_groups.get(group, ())
+            if channel != self.reading_channel and channel not in self.pending
+        }
+        for channel in members:
+            self.receive_buffer[channel].put_nowait(message)
+
+        token = delivered.set(members)
+        try:
+            await super().group_send(group, message)
+        finally:
+            delivered.reset(token)
+
+    def _map_channel_keys_to_connection(self, channel_names, message):
+        members = delivered.get()
+        channel_names = [channel for channel in channel_names if channel not in members]
+        mapping = super()._map_channel_keys_to_connection(channel_names, message)
+
+        # Mark the message for the channels of this process still sent
+        # through Redis, so they are sent to that way until it is read.
+        keys = set()
+        for channel in channel_names:
+            if self.is_local(channel):
+                self.pending[channel] += 1
+                keys.add(self.prefix + self.non_local_name(channel))
+        for key in keys:
+            marked = self.deserialize(mapping[1][key])
+            marked[PENDING_KEY] = True
+            mapping[1][key] = self.serialize(marked)
+
+        return mapping
+
+    async def receive(self, channel):
+        token = receiving.set(channel)
+        try:
+            return await super().receive(channel)
+        finally:
+            receiving.reset(token)
+
+    async def receive_single(self, channel):
+        local_channel = receiving.get()
+        if local_channel is None or "!" not in channel:
+            return self.read_pending(*await super().receive_single(channel))
+
+        # A message delivered before the receive lock was taken is in
+        # the buffer already, an empty list of channels puts nothing back.
+        if not self.receive_buffer[local_channel].empty():
+            return [], None
+
+        self.reading_channel = local_channel
+        try:
+            return self.read_pending(*await super().receive_single(channel))
+        finally:
+            self.reading_channel = None
+
+    def read_pending(self, channels, message):
+        """
+        Count a message this process sent to its own channels through
+        Redis as read, returning the channels and message unmarked.
+        """
+        if message.pop(PENDING_KEY, False):
+            for channel in channels if isinstance(channels, list) else [channels]:
+                self.pending[channel] -= 1
+                if self.pending[channel] <= 0:
+                    del self.pending[channel]
+
+        return channels, message
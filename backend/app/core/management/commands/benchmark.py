@@ -0,0 +1,53 @@
+"""
+Django command to run a core benchmark.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """Django command to run a benchmark and print its results as JSON."""
+
+    help = "Runs a benchmark against the configured database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+        parser.add_argument("--voters", type=int, default=10, help="Voters per room.")
+        parser.add_argument(
+            "--rounds", type=int, default=3, help="Vote rounds per room."
+        )
+        parser.add_argument(
+            "--attempts", type=int, default=3, help="Concurrent joins per voter."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=16, help="Concurrent clients."
+        )
+        parser.add_argument(
+            "--sockets", type=int, default=1000, help="Concurrent sockets."
+        )
+        parser.add_argument("--rooms", type=int, default=10, help="Concurrent rooms.")
+        parser.add_argument("--workers", type=int, default=2, help="Worker processes.")
+        parser.add_argument(
+            "--layer",
+            choices=["memory", "redis"],
+            default="memory",
+            help="Channel layer the consumers run on.",
+        )
+        parser.add_argument(
+            "--redis-url",
+            help="Redis of the redis layer, instead of the configured channel layer.",
+        )
+        parser.add_argument("--output", help="File to write the results to.")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        results = json.dumps(BENCHMARKS[options["benchmark"]](options), indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(results)
+        self.stdout.write(results)
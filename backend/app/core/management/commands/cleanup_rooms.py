@@ -0,0 +1,82 @@
+"""
+Django command to delete idle rooms.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Room, Round, Vote
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete rooms without activity for ROOM_EXPIRY_DAYS,
+    with their votes and rounds, in batches of bounded size.
+
+    Each batch is deleted in a transaction of its own, so locks are held
+    only for the rows of one batch and active rooms are never blocked for
+    long.
+    """
+
+    help = "Deletes rooms without recent activity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ROOM_EXPIRY_DAYS,
+            help="Days without activity after which a room is deleted.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rooms deleted at once."
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to wait between batches.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repeat the cleanup every given seconds instead of once.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            deleted = self.cleanup(options)
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idle rooms."))
+
+            if not options["interval"]:
+                return None
+            time.sleep(options["interval"])
+
+    def cleanup(self, options):
+        """Delete the expired rooms batch by batch and return their number."""
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted = 0
+
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    Room.objects.filter(last_activity__lt=cutoff)
+                    .order_by("last_activity")
+                    .select_for_update(skip_locked=True)
+                    .values_list("id", flat=True)[: options["batch_size"]]
+                )
+                if not ids:
+                    return deleted
+
+                Vote.objects.filter(room_id__in=ids).delete()
+                Round.objects.filter(room_id__in=ids).delete()
+                Room.objects.filter(id__in=ids).delete()
+
+            deleted += len(ids)
+            time.sleep(options["pause"])
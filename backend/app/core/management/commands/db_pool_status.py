@@ -0,0 +1,63 @@
+"""
+Django command to report database connection usage.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    """Django command to report the connections of the application."""
+
+    help = "Reports the connection pool configuration and usage"
+
+    def handle(self, *args, **kwargs):
+        """Entrypoint for command."""
+        db = settings.DATABASES["default"]
+        application_name = db.get("OPTIONS", {}).get("application_name")
+
+        self.stdout.write(
+            f"Consumer connection age: {settings.CONSUMER_DB_CONN_MAX_AGE}s"
+        )
+        self.stdout.write(f"Request connection age: {db.get('CONN_MAX_AGE', 0)}s")
+        self.stdout.write(f"Health checks: {db.get('CONN_HEALTH_CHECKS', False)}")
+        self.stdout.write(
+            "Connections per worker: "
+            f"at most {settings.CONSUMER_DB_POOL_SIZE} persistent "
+            "for the consumer pool threads, "
+            "plus 1 per API request in progress"
+        )
+
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                self.style.WARNING(
+                    "Connection usage is only reported on PostgreSQL, "
+                    f"not {connection.vendor}."
+                )
+            )
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW max_connections")
+            max_connections = int(cursor.fetchone()[0])
+            cursor.execute(
+                "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND application_name = %s "
+                "GROUP BY 1 ORDER BY 1",
+                [application_name],
+            )
+            states = cursor.fetchall()
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database()"
+            )
+            total = cursor.fetchone()[0]
+
+        used = sum(count for _, count in states)
+        self.stdout.write(
+            f"Connections of {application_name}: {used} "
+            f"({total} to the database, {max_connections} allowed by the server)"
+        )
+        for state, count in states:
+            self.stdout.write(f"  {state}: {count}")
@@ -0,0 +1,145 @@
+"""
+Core metrics.
+"""
+
+import bisect
+import functools
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def format_labels(labels, **extra):
+    """Return the Prometheus text of a sorted tuple of label pairs."""
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        """Count a value in the first bucket it does not exceed."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        """Return the number of observed values."""
+        return sum(self.counts)
+
+
+class Metrics:
+    """
+    In-process counters and histograms of consumer activity.
+
+    Every metric is identified by its name and labels. Nothing is recorded
+    while METRICS_ENABLED is off, so the instrumentation costs a setting
+    lookup per call. Each worker process keeps its own metrics.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.histograms = {}
+
+    @property
+    def enabled(self):
+        """Return whether metrics are recorded."""
+        return settings.METRICS_ENABLED
+
+    def increment(self, name, value=1, **labels):
+        """Increase the named counter by value."""
+        if self.enabled:
+            self.counters[name, tuple(sorted(labels.items()))] += value
+
+    def get(self, name, **labels):
+        """Return the current value of the named counter."""
+        return self.counters[name, tuple(sorted(labels.items()))]
+
+    def observe(self, name, value, **labels):
+        """Record a value in the named histogram."""
+        if self.enabled:
+            key = (name, tuple(sorted(labels.items())))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def get_histogram(self, name, **labels):
+        """Return the named histogram or None if nothing was observed."""
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Record the seconds the block took in the named histogram."""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorate a coroutine function to record the seconds each call took."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        typed = set()
+
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(
+            self.histograms.items(), key=lambda item: item[0]
+        ):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+
+            cumulative = 0
+            for bound, count in zip(
+                [*histogram.buckets, "+Inf"], histogram.counts, strict=True
+            ):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}"
+                )
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_rename_owner_vote_voter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="custom_deck",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="room",
+            name="deck",
+            field=models.CharField(
+                choices=[
+                    ("fibonacci", "Fibonacci"),
+                    ("tshirt", "T-shirt sizes"),
+                    ("powers_of_two", "Powers of two"),
+                    ("custom", "Custom"),
+                ],
+                default="fibonacci",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="vote",
+            name="value",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
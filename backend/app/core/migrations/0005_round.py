@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_room_deck"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="round",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="vote",
+            name="round",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:04
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_voters(apps, schema_editor):
+    """
+    Rename every voter sharing its name with an older voter of the same
+    room, which joins racing each other could create, by a number suffix.
+    """
+    Vote = apps.get_model("core", "Vote")
+    max_length = Vote._meta.get_field("voter").max_length
+
+    duplicates = (
+        Vote.objects.values("room_id", "voter")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        taken = set(
+            Vote.objects.filter(room_id=duplicate["room_id"]).values_list(
+                "voter", flat=True
+            )
+        )
+        votes = Vote.objects.filter(
+            room_id=duplicate["room_id"], voter=duplicate["voter"]
+        ).order_by("id")[1:]
+
+        number = 1
+        for vote in votes:
+            name = vote.voter
+            while name in taken:
+                number += 1
+                suffix = f" {number}"
+                name = vote.voter[: max_length - len(suffix)] + suffix
+            taken.add(name)
+            vote.voter = name
+            vote.save(update_fields=["voter"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_round"),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_voters, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="vote",
+            constraint=models.UniqueConstraint(
+                fields=("room", "voter"), name="unique_room_voter"
+            ),
+        ),
+    ]
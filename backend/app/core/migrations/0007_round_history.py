@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_vote_unique_room_voter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Round",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField()),
+                ("values", models.JSONField(default=dict)),
+                ("average", models.FloatField(blank=True, null=True)),
+                ("median", models.FloatField(blank=True, null=True)),
+                ("mode", models.IntegerField(blank=True, null=True)),
+                ("agreement", models.FloatField(blank=True, null=True)),
+                ("revealed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rounds",
+                        to="core.room",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="round",
+            constraint=models.UniqueConstraint(
+                fields=("room", "number"), name="unique_room_round_number"
+            ),
+        ),
+    ]
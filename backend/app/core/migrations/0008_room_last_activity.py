@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_round_history"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="last_activity",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
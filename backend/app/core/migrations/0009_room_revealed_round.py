@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_room_last_activity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="room",
+            name="revealed_round",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
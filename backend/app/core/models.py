@@ -4,8 +4,26 @@ Core models.
 
 import uuid
 
-from django.contrib.auth.hashers import PBKDF2PasswordHasher
-from django.db import models
+from django.contrib.auth import hashers
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from core.decks import CUSTOM, DECK_CHOICES, DECKS, FIBONACCI, Deck
+from core.passwords import (
+    encode_password,
+    get_room_password_hasher,
+    hash_room_passwords,
+)
+
+
+def quote_columns(connection, model, *names):
+    """Return the quoted table name and field column names of a model."""
+    opts = model._meta
+    quote_name = connection.ops.quote_name
+
+    return [quote_name(opts.db_table)] + [
+        quote_name(opts.get_field(name).column) for name in names
+    ]
 
 
 class RoomManager(models.Manager):
@@ -19,38 +37,209 @@ class RoomManager(models.Manager):
 
         return room
 
+    def create_rooms(self, rooms):
+        """
+        Create and return new room instances and their votes from a list of
+        room fields, each with a password and the names of its voters.
+
+        Passwords are hashed in parallel first, then all rooms and votes
+        are saved with two INSERT statements in a single transaction.
+        """
+        rooms = [dict(room) for room in rooms]
+        passwords = hash_room_passwords([room.pop("password", "") for room in rooms])
+        voters = [room.pop("voters", []) for room in rooms]
+
+        instances = [
+            self.model(password=password, **room)
+            for room, password in zip(rooms, passwords, strict=True)
+        ]
+        with transaction.atomic(using=self.db):
+            instances = self.bulk_create(instances)
+            votes = Vote.objects.using(self.db).bulk_create(
+                Vote(room=room, voter=voter)
+                for room, names in zip(instances, voters, strict=True)
+                for voter in names
+            )
+
+        return instances, votes
+
+    def next_round(self, room_id):
+        """
+        Start the next voting round of a room with a single UPDATE statement,
+        recording the room activity, and return its number or None if the room
+        does not exist.
+        """
+        connection = connections[self.db]
+        table, pk, round, last_activity = quote_columns(
+            connection, self.model, "id", "round", "last_activity"
+        )
+        now = self.model._meta.get_field("last_activity").get_db_prep_value(
+            timezone.now(), connection
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {round} = {round} + 1, {last_activity} = %s "
+                f"WHERE {pk} = %s RETURNING {round}",
+                [now, self.model._meta.pk.get_db_prep_value(room_id, connection)],
+            )
+            row = cursor.fetchone()
+
+        return row[0] if row else None
+
+    def touch(self, room_id):
+        """Record activity in a room."""
+        return self.filter(id=room_id).update(last_activity=timezone.now())
+
+    def reveal_round(self, room_id, number):
+        """Mark a round of a room as revealed, recording the room activity."""
+        return self.filter(id=room_id).update(
+            revealed_round=number, last_activity=timezone.now()
+        )
+
+
+class VoteManager(models.Manager):
+    """Vote manager."""
+
+    def cast_vote(self, room_id, vote_id, value):
+        """
+        Set the value of a room vote in the current room round with a single
+        UPDATE statement and return its id and voter, or None if the room
+        has no such vote.
+        """
+        connection = connections[self.db]
+        table, pk, room, value_column, round, voter = quote_columns(
+            connection, self.model, "id", "room", "value", "round", "voter"
+        )
+        room_table, room_pk, room_round = quote_columns(connection, Room, "id", "round")
+        room_id = Room._meta.pk.get_db_prep_value(room_id, connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {value_column} = %s, {round} = "
+                f"(SELECT {room_round} FROM {room_table} WHERE {room_pk} = %s) "
+                f"WHERE {pk} = %s AND {room} = %s "
+                f"RETURNING {pk}, {voter}",
+                [value, room_id, vote_id, room_id],
+            )
+            row = cursor.fetchone()
+
+        return row
+
 
 class Room(models.Model):
     """Room model."""
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     password = models.CharField(max_length=128, blank=True)
+    deck = models.CharField(max_length=20, choices=DECK_CHOICES, default=FIBONACCI)
+    custom_deck = models.JSONField(default=list, blank=True)
+    round = models.PositiveIntegerField(default=1)
+    last_activity = models.DateTimeField(default=timezone.now, db_index=True)
+    revealed_round = models.PositiveIntegerField(null=True, blank=True)
 
     objects = RoomManager()
 
     def set_password(self, raw_password):
-        """Hash and set password from raw_password."""
-        self.password = PBKDF2PasswordHasher().encode(raw_password, uuid.uuid4().hex)
+        """
+        Hash and set password from raw_password, leaving an empty
+        password unhashed so passwordless rooms never pay for hashing.
+        """
+        if not raw_password:
+            self.password = ""
+            return None
+
+        self.password = encode_password(get_room_password_hasher(), raw_password)
 
     def check_password(self, raw_password):
-        """Return a boolean of whether the raw_password was correct."""
-        return PBKDF2PasswordHasher().verify(raw_password, self.password)
+        """
+        Return a boolean of whether the raw_password was correct,
+        verifying passwords hashed by previously configured hashers too.
+        """
+        if not self.password:
+            return not raw_password
+
+        hasher = get_room_password_hasher()
+        if self.password.startswith(f"{hasher.algorithm}$"):
+            return hasher.verify(raw_password, self.password)
+        return hashers.check_password(raw_password, self.password)
+
+    def get_deck(self):
+        """Return the estimation deck of the room."""
+        if self.deck == CUSTOM:
+            return Deck(self.custom_deck)
+        return Deck(DECKS[self.deck])
 
 
 class Vote(models.Model):
     """Vote model."""
 
-    VALUE_CHOICES = (
-        (1, "1"),
-        (2, "2"),
-        (3, "3"),
-        (5, "5"),
-        (8, "8"),
-        (13, "13"),
-        (20, "20"),
-        (40, "40"),
-    )
+    VALUE_CHOICES = DECKS[FIBONACCI]
 
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="votes")
     voter = models.CharField(max_length=20)
-    value = models.IntegerField(choices=VALUE_CHOICES, null=True, blank=True)
+    value = models.IntegerField(null=True, blank=True)
+    round = models.PositiveIntegerField(default=1)
+
+    objects = VoteManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "voter"], name="unique_room_voter")
+        ]
+
+
+class RoundManager(models.Manager):
+    """Round manager."""
+
+    def save_round(self, room_id, number, values, stats):
+        """
+        Save the revealed values and statistics of a room round with a
+        single statement, replacing the record of an earlier reveal.
+        """
+        round = self.model(
+            room_id=room_id,
+            number=number,
+            values=values,
+            average=stats["average"],
+            median=stats["median"],
+            mode=stats["mode"],
+            agreement=stats["agreement"],
+        )
+        self.bulk_create(
+            [round],
+            update_conflicts=True,
+            unique_fields=["room", "number"],
+            update_fields=[
+                "values",
+                "average",
+                "median",
+                "mode",
+                "agreement",
+                "revealed_at",
+            ],
+        )
+
+        return round
+
+
+class Round(models.Model):
+    """Revealed room round model."""
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="rounds")
+    number = models.PositiveIntegerField()
+    values = models.JSONField(default=dict)
+    average = models.FloatField(null=True, blank=True)
+    median = models.FloatField(null=True, blank=True)
+    mode = models.IntegerField(null=True, blank=True)
+    agreement = models.FloatField(null=True, blank=True)
+    revealed_at = models.DateTimeField(auto_now=True)
+
+    objects = RoundManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "number"], name="unique_room_round_number"
+            )
+        ]
@@ -0,0 +1,72 @@
+"""
+Core room passwords.
+"""
+
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_executor = None
+
+
+@functools.lru_cache(maxsize=None)
+def get_room_password_hasher():
+    """
+    Return the configured room password hasher, with the configured
+    work factor if there is one.
+    """
+    hasher = import_string(settings.ROOM_PASSWORD_HASHER)()
+    if settings.ROOM_PASSWORD_ITERATIONS:
+        hasher.iterations = settings.ROOM_PASSWORD_ITERATIONS
+    return hasher
+
+
+def get_password_executor():
+    """
+    Return the process pool room passwords are hashed on in bulk, created
+    on first use with ROOM_PASSWORD_WORKERS processes. Processes are
+    spawned rather than forked, as forking a threaded server is unsafe.
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.ROOM_PASSWORD_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def close_password_executor():
+    """Shut the password hashing pool down, to be recreated on next use."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def encode_password(hasher, raw_password):
+    """Return the hash of a raw password, or an empty password unhashed."""
+    if not raw_password:
+        return ""
+    return hasher.encode(raw_password, hasher.salt())
+
+
+def hash_room_passwords(raw_passwords):
+    """
+    Return the hashes of a list of raw room passwords, hashing them
+    in parallel on the password pool when there are several to hash.
+    """
+    hasher = get_room_password_hasher()
+    if sum(1 for raw_password in raw_passwords if raw_password) < 2:
+        return [encode_password(hasher, password) for password in raw_passwords]
+
+    return list(
+        get_password_executor().map(
+            functools.partial(encode_password, hasher), raw_passwords
+        )
+    )
@@ -0,0 +1,30 @@
+"""
+Core rate limiting.
+"""
+
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket allowing bursts of burst actions and rate actions
+    per second on average.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def consume(self):
+        """Take a token and return True, or return False if there is none."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
@@ -0,0 +1,39 @@
+"""
+Core signals.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from core.db import close_db_executor
+from core.decks import room_decks
+from core.models import Room
+from core.passwords import close_password_executor, get_room_password_hasher
+
+
+@receiver([post_save, post_delete], sender=Room)
+def invalidate_room_deck(sender, instance, **kwargs):
+    """Drop the cached deck of a saved or deleted room."""
+    room_decks.invalidate(instance.pk)
+
+
+@receiver(setting_changed)
+def reset_room_password_hasher(setting, **kwargs):
+    """Drop the cached room password hasher when its settings change."""
+    if setting in ("ROOM_PASSWORD_HASHER", "ROOM_PASSWORD_ITERATIONS"):
+        get_room_password_hasher.cache_clear()
+
+
+@receiver(setting_changed)
+def reset_password_executor(setting, **kwargs):
+    """Recreate the password hashing pool when its size changes."""
+    if setting == "ROOM_PASSWORD_WORKERS":
+        close_password_executor()
+
+
+@receiver(setting_changed)
+def reset_db_executor(setting, **kwargs):
+    """Recreate the consumer database pool when its settings change."""
+    if setting in ("CONSUMER_DB_POOL_SIZE", "CONSUMER_DB_CONN_MAX_AGE"):
+        close_db_executor()
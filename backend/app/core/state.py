@@ -0,0 +1,265 @@
+"""
+Core room state.
+"""
+
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+from core.encoding import encode
+from core.ratelimit import TokenBucket
+
+APPLIED_EVENTS_LIMIT = 1024
+
+
+def get_room_group_name(room_id):
+    """Return the channel layer group name of a room."""
+    return f"room_{room_id}"
+
+
+class RoomState:
+    """
+    In-memory vote state of a single room.
+
+    Every consumer of the room in this process shares one instance.
+    Changes are applied through apply() with the id of the group event
+    that carries them, so an event delivered to several local consumers
+    mutates the state only once and bumps its version by one. The client
+    frame of an event is likewise encoded once per frame format and shared
+    by the consumers.
+
+    Presence maps the vote ids of connected voters to the time their
+    presence expires unless refreshed by a heartbeat, sweeper being the
+    task announcing expired voters as offline while the state is loaded.
+
+    Counts keeps how many voters cast each value in the current round,
+    updated as changes are applied, so round statistics are computed from
+    the distinct values of the deck instead of every vote.
+
+    Touched at is the time room activity was last recorded in the database,
+    so consumers record it at most once per ROOM_ACTIVITY_INTERVAL.
+
+    Rate limit is the token bucket the room actions of all local
+    consumers of the room are taken from.
+
+    Reveal holds the votes and statistics of the revealed round, so its
+    frame is sent again without reading or computing anything, until a
+    vote or reset makes it stale.
+    """
+
+    def __init__(self, room_id, votes=(), round=1):
+        self.room_id = room_id
+        self.round = round
+        self.version = 0
+        self.votes = OrderedDict(
+            (vote_id, {"voter": voter, "value": value})
+            for vote_id, voter, value in votes
+        )
+        self.counts = Counter(
+            vote["value"] for vote in self.votes.values() if vote["value"] is not None
+        )
+        self.presence = {}
+        self.sweeper = None
+        self.sockets = Counter()
+        self.touched_at = 0
+        self.reveal = None
+        self.rate_limit = TokenBucket(
+            settings.ROOM_RATE_LIMIT, settings.ROOM_RATE_BURST
+        )
+        self._applied = OrderedDict()
+        self._frames = OrderedDict()
+
+    def apply(self, event_id, changes):
+        """
+        Apply a list of changes once and return the state version it
+        produced, or None if the changes did not change the state.
+        """
+        if event_id not in self._applied:
+            changed = [self._apply_change(change) for change in changes]
+
+            self._applied[event_id] = None
+            if any(changed):
+                self.version += 1
+                self._applied[event_id] = self.version
+            if len(self._applied) > APPLIED_EVENTS_LIMIT:
+                self._applied.popitem(last=False)
+
+        return self._applied[event_id]
+
+    def get_frame(self, event_id, build, format="json"):
+        """
+        Return the client frame of an event in a frame format, building
+        the payload only on the first call and encoding it once per format.
+        """
+        frames = self._frames.get(event_id)
+        if frames is None:
+            frames = self._frames[event_id] = {None: build()}
+            if len(self._frames) > APPLIED_EVENTS_LIMIT:
+                self._frames.popitem(last=False)
+
+        frame = frames.get(format)
+        if frame is None:
+            frame = frames[format] = encode(frames[None], format)
+
+        return frame
+
+    def _apply_change(self, change):
+        """
+        Apply a single join, vote, reveal, reset or presence change and
+        return whether clients have to be told about it.
+        """
+        match change["kind"]:
+            case "join":
+                self.votes.setdefault(
+                    change["vote_id"], {"voter": change["voter"], "value": None}
+                )
+            case "vote":
+                vote = self.votes.get(change["vote_id"])
+                if vote is not None and vote["value"] is not None:
+                    self.counts[vote["value"]] -= 1
+                    if not self.counts[vote["value"]]:
+                        del self.counts[vote["value"]]
+                if change["value"] is not None:
+                    self.counts[change["value"]] += 1
+
+                self.votes[change["vote_id"]] = {
+                    "voter": change["voter"],
+                    "value": change["value"],
+                }
+                self.reveal = None
+            case "reveal":
+                self.reveal = {"votes": change["votes"], "stats": change["stats"]}
+            case "reset":
+                self.round = change["round"]
+                self.reveal = None
+                self.counts.clear()
+                for vote in self.votes.values():
+                    vote["value"] = None
+            case "presence":
+                vote_id = change["vote_id"]
+                expires_at = change["expires_at"]
+                if expires_at is None:
+                    return self.presence.pop(vote_id, None) is not None
+
+                online = vote_id in self.presence
+                self.presence[vote_id] = max(
+                    expires_at, self.presence.get(vote_id, expires_at)
+                )
+                return not online
+
+        return True
+
+    def get_expired_presence(self, now):
+        """Return the vote ids whose presence expired at the given time."""
+        return [
+            vote_id
+            for vote_id, expires_at in self.presence.items()
+            if expires_at <= now
+        ]
+
+    def get_stats(self):
+        """
+        Returns the statistics of the values cast in the current round,
+        the agreement being the percentage of votes for the mode.
+        """
+        total = sum(self.counts.values())
+        if not total:
+            return {
+                "votes": 0,
+                "average": None,
+                "median": None,
+                "mode": None,
+                "agreement": None,
+            }
+
+        values = sorted(self.counts)
+        middle = []
+        seen = 0
+        for value in values:
+            seen += self.counts[value]
+            if not middle and seen > (total - 1) // 2:
+                middle.append(value)
+            if seen > total // 2:
+                middle.append(value)
+                break
+
+        mode = max(values, key=lambda value: (self.counts[value], -value))
+        return {
+            "votes": total,
+            "average": sum(value * count for value, count in self.counts.items())
+            / total,
+            "median": sum(middle) / 2,
+            "mode": mode,
+            "agreement": self.counts[mode] * 100 / total,
+        }
+
+    def get_final_vote_list(self):
+        """
+        Returns a list of votes with vote values.
+        """
+        return [
+            {
+                "voter": vote["voter"],
+                "value": vote["value"],
+                "voted": vote["value"] is not None,
+                "online": vote_id in self.presence,
+            }
+            for vote_id, vote in self.votes.items()
+        ]
+
+    def get_hidden_vote_list(self):
+        """
+        Returns a list of votes without vote values but
+        with information is already voted or not.
+        """
+        return [
+            {
+                "voter": vote["voter"],
+                "voted": vote["value"] is not None,
+                "online": vote_id in self.presence,
+            }
+            for vote_id, vote in self.votes.items()
+        ]
+
+
+class RoomStateRegistry:
+    """
+    Process-wide registry of room states.
+
+    A state is kept only while at least one consumer of the room in this
+    process holds it, because only then does the process receive the
+    room group events that keep it up to date.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._holders = {}
+
+    def __contains__(self, room_id):
+        return room_id in self._states
+
+    def get(self, room_id):
+        """Return the state of a room or None if it is not loaded."""
+        return self._states.get(room_id)
+
+    def acquire(self, state):
+        """
+        Register a consumer of the state's room and return the state
+        the room consumers share, which is the given one if the room
+        was not loaded yet.
+        """
+        state = self._states.setdefault(state.room_id, state)
+        self._holders[state.room_id] = self._holders.get(state.room_id, 0) + 1
+        return state
+
+    def release(self, room_id):
+        """Unregister a consumer of the room, dropping unused state."""
+        holders = self._holders.get(room_id, 0) - 1
+        if holders > 0:
+            self._holders[room_id] = holders
+        else:
+            self._holders.pop(room_id, None)
+            self._states.pop(room_id, None)
+
+
+room_states = RoomStateRegistry()
@@ -0,0 +1,23 @@
+"""
+Core tests configuration.
+"""
+
+import pytest
+
+from core.db import close_db_executor
+
+
+@pytest.fixture(scope="session", autouse=True)
+def consumer_db_pool(django_db_setup, django_db_blocker):
+    """Close the consumer database pool before the test databases are dropped."""
+    yield
+    with django_db_blocker.unblock():
+        close_db_executor()
+
+
+@pytest.fixture(autouse=True)
+def in_memory_channel_layer(settings):
+    """Use the in-memory channel layer instead of Redis."""
+    settings.CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    }
@@ -7,10 +7,13 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 
+from core.decks import DECKS
 from core.models import (
     Room,
+    Round,
     Vote,
 )
+from core.tokens import check_room_token, check_voter_token, make_room_token
 
 from core.tests.factories import (
     RoomFactory,
@@ -18,6 +21,7 @@ from core.tests.factories import (
 )
 
 CREATE_ROOM_URL = reverse("create-room")
+CREATE_ROOMS_URL = reverse("create-rooms")
 JOIN_ROOM_URL = reverse("join-room")
 
 
@@ -40,6 +44,10 @@ class TestCreateRoomApi:
         # Check created room password is blank
         assert room.check_password(payload["password"])
 
+        # Check the creator got a token of the room
+        assert check_room_token(res.data["token"], room.id)["vote"] is None
+        assert res.data["worker"] is None
+
     def test_create_room_with_empty_password(self, client):
         """Test create new room with empty password."""
         payload = {"password": ""}
@@ -78,6 +86,141 @@ class TestCreateRoomApi:
         assert res.status_code == status.HTTP_400_BAD_REQUEST
         assert "password" in res.data
 
+    def test_create_room_with_deck(self, client):
+        """Test create new room with predefined deck."""
+        payload = {"deck": "tshirt"}
+        res = client.post(CREATE_ROOM_URL, payload)
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["deck"] == payload["deck"]
+
+        room = Room.objects.get(id=res.data["id"])
+
+        # Check created room deck is T-shirt deck
+        assert room.get_deck().choices == DECKS["tshirt"]
+
+    def test_create_room_with_custom_deck(self, client):
+        """Test create new room with custom deck."""
+        payload = {
+            "deck": "custom",
+            "custom_deck": [{"value": 0, "label": "?"}, {"value": 1, "label": "1"}],
+        }
+        res = client.post(CREATE_ROOM_URL, payload, content_type="application/json")
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_201_CREATED
+        assert "custom_deck" not in res.data
+
+        room = Room.objects.get(id=res.data["id"])
+
+        # Check created room deck is the custom deck
+        assert room.get_deck().choices == ((0, "?"), (1, "1"))
+
+    def test_create_room_with_empty_custom_deck(self, client):
+        """Test create new room error if custom deck has no choices."""
+        payload = {"deck": "custom", "custom_deck": []}
+        res = client.post(CREATE_ROOM_URL, payload, content_type="application/json")
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "custom_deck" in res.data
+
+
+@pytest.mark.django_db
+class TestCreateRoomsApi:
+    """Bulk room API tests."""
+
+    @pytest.fixture
+    def client(self, client, settings):
+        """Client sending the room provisioning key."""
+        settings.ROOM_PROVISIONING_KEY = "SampleKey"
+        client.defaults["HTTP_X_API_KEY"] = "SampleKey"
+        return client
+
+    def test_create_rooms(self, client, settings):
+        """Test create many rooms with their voters at once."""
+        settings.ROOM_PASSWORD_ITERATIONS = 1000
+        payload = {
+            "rooms": [
+                {"password": "SamplePassword1", "voters": ["Voter1", "Voter2"]},
+                {"password": "SamplePassword2", "deck": "tshirt"},
+                {"password": ""},
+            ]
+        }
+        res = client.post(CREATE_ROOMS_URL, payload, content_type="application/json")
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_201_CREATED
+        assert len(res.data["rooms"]) == 3
+        first, second, third = res.data["rooms"]
+        assert check_room_token(first["token"], first["id"])["vote"] is None
+        assert [voter["voter"] for voter in first["voters"]] == ["Voter1", "Voter2"]
+        assert (second["voters"], third["voters"]) == ([], [])
+
+        # Check voter tokens are bound to their votes
+        voter = first["voters"][0]
+        token = check_room_token(voter["token"], first["id"])
+        assert (token["vote"], token["voter"]) == (voter["id"], "Voter1")
+
+        # Check rooms were saved with hashed passwords and their votes
+        rooms = [Room.objects.get(id=room["id"]) for room in res.data["rooms"]]
+        assert rooms[0].check_password("SamplePassword1")
+        assert rooms[1].check_password("SamplePassword2")
+        assert rooms[1].deck == "tshirt"
+        assert rooms[2].password == ""
+        assert Vote.objects.filter(room=rooms[0]).count() == 2
+
+    def test_create_rooms_with_invalid_room(self, client):
+        """Test no room is created if any of them is invalid."""
+        payload = {
+            "rooms": [
+                {"password": "", "voters": ["Voter1"]},
+                {"password": "", "voters": ["Voter1", "Voter1"]},
+            ]
+        }
+        res = client.post(CREATE_ROOMS_URL, payload, content_type="application/json")
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "voters" in res.data["rooms"][1]
+        assert not Room.objects.exists()
+
+    def test_create_no_rooms(self, client):
+        """Test create rooms error if no rooms are given."""
+        res = client.post(
+            CREATE_ROOMS_URL, {"rooms": []}, content_type="application/json"
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_create_rooms_without_key(self, client):
+        """Test create rooms error without the provisioning key."""
+        payload = {"rooms": [{"password": ""}]}
+        for headers in ({"X-Api-Key": ""}, {"X-Api-Key": "OtherKey"}):
+            res = client.post(
+                CREATE_ROOMS_URL,
+                payload,
+                content_type="application/json",
+                headers=headers,
+            )
+
+            assert res.status_code == status.HTTP_403_FORBIDDEN
+        assert not Room.objects.exists()
+
+    def test_create_rooms_without_key_set(self, client, settings, admin_user):
+        """Test create rooms error for everybody but staff if no key is set."""
+        settings.ROOM_PROVISIONING_KEY = ""
+        payload = {"rooms": [{"password": ""}]}
+        res = client.post(CREATE_ROOMS_URL, payload, content_type="application/json")
+
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+
+        client.force_login(admin_user)
+        res = client.post(CREATE_ROOMS_URL, payload, content_type="application/json")
+
+        assert res.status_code == status.HTTP_201_CREATED
+
 
 @pytest.mark.django_db
 class TestJoinRoomApi:
@@ -137,3 +280,212 @@ class TestJoinRoomApi:
         assert res.status_code == status.HTTP_400_BAD_REQUEST
         assert "id" not in res.data
         assert "voter" in res.data
+
+    def test_join_room_returns_token(self, client):
+        """Test join to room returns a token of the new voter."""
+        room = RoomFactory.create(password="")
+        payload = {"room": str(room.id), "voter": "Voter 1"}
+        res = client.post(JOIN_ROOM_URL, payload)
+
+        # Check response status and token
+        assert res.status_code == status.HTTP_201_CREATED
+        assert check_room_token(res.data["token"], room.id) == {
+            "room": str(room.id),
+            "vote": res.data["id"],
+            "voter": payload["voter"],
+        }
+
+    def test_join_room_returns_room_worker(self, client, settings):
+        """Test join to room returns the same worker for every room voter."""
+        settings.ROOM_WORKERS = ["ws://ws1:8000", "ws://ws2:8000", "ws://ws3:8000"]
+        room = RoomFactory.create(password="")
+
+        workers = {
+            client.post(JOIN_ROOM_URL, {"room": str(room.id), "voter": voter}).data[
+                "worker"
+            ]
+            for voter in ("Voter 1", "Voter 2")
+        }
+
+        # Check both voters were sent to one of the workers
+        assert len(workers) == 1
+        assert workers <= set(settings.ROOM_WORKERS)
+
+    def test_join_room_with_token(self, client):
+        """Test join to room with a room token instead of the password."""
+        room = RoomFactory.create(password="SamplePassword123")
+        payload = {
+            "room": str(room.id),
+            "token": make_room_token(room.id),
+            "voter": "Voter 1",
+        }
+        res = client.post(JOIN_ROOM_URL, payload)
+
+        # Check response status
+        assert res.status_code == status.HTTP_201_CREATED
+        assert Vote.objects.filter(room=room, voter=payload["voter"]).exists()
+
+    def test_join_room_with_token_of_other_room(self, client):
+        """Test join to room error if the token was issued for other room."""
+        room = RoomFactory.create(password="SamplePassword123")
+        other_room = RoomFactory.create(password="SamplePassword123")
+        payload = {
+            "room": str(room.id),
+            "token": make_room_token(other_room.id),
+            "voter": "Voter 1",
+        }
+        res = client.post(JOIN_ROOM_URL, payload)
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in res.data
+
+    def test_join_room_again_with_expired_voter_token(self, client, settings):
+        """Test a voter joins again under its name with its expired token."""
+        settings.ROOM_TOKEN_MAX_AGE = -1
+        room = RoomFactory.create(password="SamplePassword123")
+        vote = VoteFactory(room=room, voter="Voter1")
+        payload = {
+            "room": str(room.id),
+            "password": "SamplePassword123",
+            "token": make_room_token(room.id, vote.id, vote.voter),
+            "voter": vote.voter,
+        }
+        res = client.post(JOIN_ROOM_URL, payload)
+
+        # Check response status, data and the voter was not added again
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["id"] == vote.id
+        assert check_voter_token(res.data["token"], room.id)["vote"] == vote.id
+        assert Vote.objects.filter(room=room).count() == 1
+
+    def test_join_room_again_with_expired_voter_token_and_wrong_password(
+        self, client, settings
+    ):
+        """Test join to room error if an expired voter token comes without password."""
+        settings.ROOM_TOKEN_MAX_AGE = -1
+        room = RoomFactory.create(password="SamplePassword123")
+        vote = VoteFactory(room=room, voter="Voter1")
+        token = make_room_token(room.id, vote.id, vote.voter)
+        for password in ("", "WrongPassword"):
+            payload = {
+                "room": str(room.id),
+                "password": password,
+                "token": token,
+                "voter": vote.voter,
+            }
+            res = client.post(JOIN_ROOM_URL, payload)
+
+            # Check response status and data
+            assert res.status_code == status.HTTP_400_BAD_REQUEST
+            assert "password" in res.data
+
+    def test_join_room_again_with_voter_token(self, client):
+        """Test a voter joins again under its name with its valid token."""
+        room = RoomFactory.create(password="SamplePassword123")
+        vote = VoteFactory(room=room, voter="Voter1")
+        payload = {
+            "room": str(room.id),
+            "token": make_room_token(room.id, vote.id, vote.voter),
+            "voter": vote.voter,
+        }
+        res = client.post(JOIN_ROOM_URL, payload)
+
+        # Check response status, data and the voter was not added again
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["id"] == vote.id
+        assert Vote.objects.filter(room=room).count() == 1
+
+    def test_join_room_with_expired_voter_token_as_other_voter(self, client, settings):
+        """Test join to room error if an expired voter token names other voter."""
+        settings.ROOM_TOKEN_MAX_AGE = -1
+        room = RoomFactory.create(password="SamplePassword123")
+        vote = VoteFactory(room=room, voter="Voter1")
+        payload = {
+            "room": str(room.id),
+            "token": make_room_token(room.id, vote.id, vote.voter),
+            "voter": "Voter 2",
+        }
+        res = client.post(JOIN_ROOM_URL, payload)
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in res.data
+
+
+@pytest.mark.django_db
+class TestRoomHistoryApi:
+    """Room history API tests."""
+
+    def test_room_history(self, client):
+        """Test room rounds are listed newest first, page by page."""
+        room = RoomFactory.create()
+        stats = {"average": 5.0, "median": 5.0, "mode": 5, "agreement": 100.0}
+        for number in range(1, 4):
+            Round.objects.save_round(room.id, number, {"Voter1": 5}, stats)
+
+        url = reverse("room-history", args=[room.id])
+        res = client.get(url, {"token": make_room_token(room.id), "page_size": 2})
+
+        # Check response status and data
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["count"] == 3
+        assert [round["number"] for round in res.data["results"]] == [3, 2]
+        assert res.data["results"][0]["values"] == {"Voter1": 5}
+        assert res.data["results"][0]["agreement"] == 100.0
+
+    def test_room_history_without_token(self, client):
+        """Test room history error if the token was issued for other room."""
+        room = RoomFactory.create()
+        other_room = RoomFactory.create()
+
+        url = reverse("room-history", args=[room.id])
+        res = client.get(url, {"token": make_room_token(other_room.id)})
+
+        # Check response status
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestMetricsApi:
+    """Metrics API tests."""
+
+    @pytest.fixture
+    def client(self, client, settings):
+        """Client sending the metrics key."""
+        settings.METRICS_KEY = "SampleKey"
+        client.defaults["HTTP_X_API_KEY"] = "SampleKey"
+        return client
+
+    def test_metrics(self, client):
+        """Test metrics are served in the Prometheus text format."""
+        room = RoomFactory.create(password="")
+        client.post(JOIN_ROOM_URL, {"room": str(room.id), "voter": "Voter 1"})
+        res = client.get(reverse("metrics"))
+
+        # Check response status and content
+        assert res.status_code == status.HTTP_200_OK
+        assert res["Content-Type"].startswith("text/plain")
+        assert b"# TYPE group_send_seconds histogram" in res.content
+
+    def test_metrics_disabled(self, client, settings):
+        """Test metrics are not served while disabled."""
+        settings.METRICS_ENABLED = False
+        res = client.get(reverse("metrics"))
+
+        # Check response status
+        assert res.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_metrics_without_key(self, client, admin_user):
+        """Test metrics are only served to staff without the metrics key."""
+        for headers in ({"X-Api-Key": ""}, {"X-Api-Key": "OtherKey"}):
+            res = client.get(reverse("metrics"), headers=headers)
+
+            # Check response status
+            assert res.status_code == status.HTTP_403_FORBIDDEN
+
+        client.force_login(admin_user)
+        res = client.get(reverse("metrics"), headers={"X-Api-Key": ""})
+
+        # Check response status
+        assert res.status_code == status.HTTP_200_OK
@@ -0,0 +1,116 @@
+"""
+Core commands tests.
+"""
+
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import (
+    Room,
+    Round,
+    Vote,
+)
+from core.tests.factories import (
+    RoomFactory,
+    VoteFactory,
+)
+
+
+@pytest.mark.django_db
+class TestCleanupRoomsCommand:
+    """Cleanup rooms command tests."""
+
+    def test_cleanup_rooms(self, settings):
+        """Test rooms idle for longer than the expiry are deleted."""
+        settings.ROOM_EXPIRY_DAYS = 30
+        idle = timezone.now() - timedelta(days=31)
+        idle_rooms = RoomFactory.create_batch(3, last_activity=idle)
+        room = RoomFactory.create(last_activity=timezone.now() - timedelta(days=29))
+        for each in [*idle_rooms, room]:
+            VoteFactory.create(room=each)
+        Round.objects.create(room=idle_rooms[0], number=1)
+
+        call_command("cleanup_rooms", batch_size=2, pause=0)
+
+        assert list(Room.objects.all()) == [room]
+        assert Vote.objects.get().room == room
+        assert not Round.objects.exists()
+
+
+@pytest.mark.django_db
+class TestDbPoolStatusCommand:
+    """Database pool status command tests."""
+
+    def test_db_pool_status(self, settings):
+        """Test the connection limits of a worker are reported."""
+        settings.CONSUMER_DB_POOL_SIZE = 4
+        settings.CONSUMER_DB_CONN_MAX_AGE = 30
+        out = StringIO()
+
+        call_command("db_pool_status", stdout=out)
+
+        output = out.getvalue()
+        assert "Consumer connection age: 30s" in output
+        assert "Request connection age: 0s" in output
+        assert (
+            "at most 4 persistent for the consumer pool threads, "
+            "plus 1 per API request in progress"
+        ) in output
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkCommand:
+    """Benchmark command tests."""
+
+    def test_load_benchmark(self, tmp_path):
+        """Test the load benchmark runs every action and writes its results."""
+        output = tmp_path / "load.json"
+
+        call_command(
+            "benchmark",
+            "load",
+            rooms=2,
+            voters=2,
+            rounds=1,
+            output=str(output),
+            stdout=StringIO(),
+        )
+
+        results = json.loads(output.read_text())
+        assert results["actions"]["vote"]["count"] == 4
+        assert results["actions"]["reveal"]["count"] == 2
+        assert results["actions"]["reset"]["queries_per_action"] >= 1
+        assert not Room.objects.exists()
+
+    @pytest.mark.skipif(
+        not os.environ.get("TEST_REDIS_URL"), reason="TEST_REDIS_URL is not set"
+    )
+    def test_workers_benchmark(self, tmp_path):
+        """Test the workers benchmark runs its rounds on the Redis at TEST_REDIS_URL."""
+        output = tmp_path / "workers.json"
+
+        call_command(
+            "benchmark",
+            "workers",
+            layer="redis",
+            redis_url=os.environ["TEST_REDIS_URL"],
+            workers=2,
+            rooms=2,
+            voters=2,
+            rounds=len(Vote.VALUE_CHOICES) + 1,
+            output=str(output),
+            stdout=StringIO(),
+        )
+
+        results = json.loads(output.read_text())
+        for placement in ("spread", "affinity"):
+            assert results[placement]["messages_per_second"] > 0
+            assert results[placement]["reset_latency_p99_ms"] > 0
+        assert not Room.objects.exists()
@@ -0,0 +1,606 @@
+"""
+Core consumers tests.
+"""
+
+import time
+import uuid
+
+import msgpack
+import pytest
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from core.benchmarks.utils import receive_action, room_communicator
+from core.consumers import PlanningPokerConsumer
+from core.decks import room_decks
+from core.metrics import metrics
+from core.models import Round, Vote
+from core.routing import websocket_urlpatterns
+from core.state import get_room_group_name, room_states
+from core.tokens import make_room_token
+from core.tests.factories import (
+    RoomFactory,
+    VoteFactory,
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPlanningPokerConsumer:
+    """Planning poker consumer tests."""
+
+    def test_connect_to_non_existing_room(self):
+        """Test connecting to non existing room closes the socket."""
+
+        async def scenario():
+            communicator = room_communicator(uuid.uuid4())
+            await communicator.connect()
+
+            data = await receive_action(communicator, "message")
+            assert data["code"] == "error"
+            assert (await communicator.receive_output())["code"] == 4001
+
+        async_to_sync(scenario)()
+
+    def test_connect_without_valid_token(self):
+        """Test connecting without a token of the room closes the socket."""
+        room = RoomFactory.create()
+        other_room = RoomFactory.create()
+
+        async def scenario():
+            for query in ("", f"?token={make_room_token(other_room.id)}"):
+                communicator = WebsocketCommunicator(
+                    URLRouter(websocket_urlpatterns), f"/ws/room/{room.id}{query}"
+                )
+                await communicator.connect()
+
+                data = await receive_action(communicator, "message")
+                assert data["message"] == "Invalid room token."
+                assert (await communicator.receive_output())["code"] == 4003
+
+        async_to_sync(scenario)()
+
+    def test_connect_sends_choices_and_votes(self):
+        """Test connecting sends vote choices and hidden votes."""
+        vote = VoteFactory.create(value=5)
+
+        async def scenario():
+            communicator = room_communicator(vote.room_id)
+            await communicator.connect()
+
+            choices = await receive_action(communicator, "get_vote_choices")
+            assert len(choices["vote_choices"]) == len(Vote.VALUE_CHOICES)
+
+            data = await receive_action(communicator, "refresh_votes")
+            assert data["votes"] == [
+                {"voter": vote.voter, "voted": True, "online": False}
+            ]
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_compact_frames(self):
+        """Test a client asking for compact frames gets columnar JSON."""
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(
+                vote.room_id, vote, subprotocols=["poker.compact"]
+            )
+            assert await communicator.connect() == (True, "poker.compact")
+
+            choices = await receive_action(communicator, "get_vote_choices")
+            assert choices["vote_choices"]["value"][0] == Vote.VALUE_CHOICES[0][0]
+
+            await communicator.send_json_to({"action": "vote", "value": 5})
+            data = await receive_action(communicator, "vote_cast")
+            assert data["votes"] == {"voter": [vote.voter], "voted": [True]}
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_msgpack_frames(self):
+        """Test a client asking for MessagePack frames gets binary frames."""
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(
+                vote.room_id, vote, subprotocols=["poker.msgpack", "poker.json"]
+            )
+            assert await communicator.connect() == (True, "poker.msgpack")
+
+            frames = [await communicator.receive_output() for _ in range(2)]
+            choices, snapshot = (msgpack.unpackb(frame["bytes"]) for frame in frames)
+            assert choices["action"] == "get_vote_choices"
+            assert snapshot["votes"]["voter"] == [vote.voter]
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_connect_sends_snapshot_only_to_new_client(self):
+        """Test a new connection does not refresh other clients."""
+        vote = VoteFactory.create()
+
+        async def scenario():
+            first = room_communicator(vote.room_id)
+            await first.connect()
+            await receive_action(first, "refresh_votes")
+
+            second = room_communicator(vote.room_id)
+            await second.connect()
+            await receive_action(second, "refresh_votes")
+
+            assert await first.receive_nothing(timeout=0.2)
+
+            await first.disconnect()
+            await second.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_vote_reveal_and_reset(self):
+        """Test a full round is broadcast to every client in the room."""
+        room = RoomFactory.create()
+        votes = VoteFactory.create_batch(2, room=room)
+
+        async def scenario():
+            communicators = [room_communicator(room.id, vote) for vote in votes]
+            for communicator in communicators:
+                await communicator.connect()
+                await receive_action(communicator, "refresh_votes")
+
+            await communicators[0].send_json_to({"action": "vote", "value": 8})
+            for communicator in communicators:
+                data = await receive_action(communicator, "vote_cast")
+                assert data["votes"] == [{"voter": votes[0].voter, "voted": True}]
+
+            await communicators[1].send_json_to({"action": "reveal"})
+            for communicator in communicators:
+                data = await receive_action(communicator, "reveal_votes")
+                assert data["votes"][0]["value"] == 8
+                assert data["stats"]["mode"] == 8
+                assert data["stats"]["agreement"] == 100
+
+            await communicators[1].send_json_to({"action": "reset"})
+            for communicator in communicators:
+                data = await receive_action(communicator, "reset_votes")
+                assert data["round"] == 2
+                assert not any(vote["voted"] for vote in data["votes"])
+
+            for communicator in communicators:
+                await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+        # Reveal saves the round to the room history
+        round = room.rounds.get()
+        assert (round.number, round.values) == (1, {votes[0].voter: 8})
+
+        # Reset starts a new round and keeps the previous round values
+        room.refresh_from_db()
+        votes[0].refresh_from_db()
+        assert room.round == 2
+        assert (votes[0].value, votes[0].round) == (8, 1)
+
+    def test_repeated_reveal_and_late_joiner(self):
+        """Test a revealed round is sent again without broadcasting it."""
+        room = RoomFactory.create()
+        vote = VoteFactory.create(room=room, value=5)
+
+        async def scenario():
+            admin = room_communicator(room.id)
+            voter = room_communicator(room.id, vote)
+            for communicator in (admin, voter):
+                await communicator.connect()
+                await receive_action(communicator, "refresh_votes")
+
+            await admin.send_json_to({"action": "reveal"})
+            first = await receive_action(voter, "reveal_votes")
+            await receive_action(admin, "reveal_votes")
+            broadcasts = metrics.get("group_send_total", type="reveal_votes_message")
+
+            # A repeated reveal is answered to its sender only
+            await admin.send_json_to({"action": "reveal"})
+            data = await receive_action(admin, "reveal_votes")
+            assert (data["votes"], data["stats"]) == (first["votes"], first["stats"])
+            assert await voter.receive_nothing(timeout=0.2)
+            assert (
+                metrics.get("group_send_total", type="reveal_votes_message")
+                == broadcasts
+            )
+
+            # A socket connecting after the reveal gets the revealed votes
+            late = room_communicator(room.id)
+            await late.connect()
+            await receive_action(late, "refresh_votes")
+            data = await receive_action(late, "reveal_votes")
+            assert data["votes"][0]["value"] == 5
+
+            # A vote makes the reveal stale, so the next one is broadcast
+            await voter.send_json_to({"action": "vote", "value": 3})
+            await receive_action(admin, "vote_cast")
+            await admin.send_json_to({"action": "reveal"})
+            data = await receive_action(voter, "reveal_votes")
+            assert data["stats"]["mode"] == 3
+
+            for communicator in (admin, voter, late):
+                await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+        room.refresh_from_db()
+        assert room.revealed_round == 1
+        assert room.rounds.get().values == {vote.voter: 3}
+
+    def test_connect_to_revealed_round(self):
+        """Test connecting to a room loaded in a revealed round."""
+        room = RoomFactory.create(revealed_round=1)
+        vote = VoteFactory.create(room=room, value=8)
+        Round.objects.create(room=room, number=1, values={vote.voter: 8})
+
+        async def scenario():
+            communicator = room_communicator(room.id)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+
+            data = await receive_action(communicator, "reveal_votes")
+            assert data["votes"][0] == {
+                "voter": vote.voter,
+                "value": 8,
+                "voted": True,
+                "online": False,
+            }
+            assert data["stats"]["mode"] == 8
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_connect_after_vote_in_revealed_round(self):
+        """Test a vote cast after the reveal keeps a reloaded room hidden."""
+        room = RoomFactory.create()
+        first, second = VoteFactory.create_batch(2, room=room, value=None)
+
+        async def scenario():
+            admin = room_communicator(room.id)
+            voter = room_communicator(room.id, second)
+            for communicator in (admin, voter):
+                await communicator.connect()
+                await receive_action(communicator, "refresh_votes")
+
+            await admin.send_json_to({"action": "reveal"})
+            await receive_action(voter, "reveal_votes")
+            await voter.send_json_to({"action": "vote", "value": 8})
+            await receive_action(admin, "vote_cast")
+            for communicator in (admin, voter):
+                await communicator.disconnect()
+
+            # The room is loaded again by the next socket
+            late = room_communicator(room.id)
+            await late.connect()
+            data = await receive_action(late, "refresh_votes")
+            assert {vote["voter"]: vote["voted"] for vote in data["votes"]} == {
+                first.voter: False,
+                second.voter: True,
+            }
+            assert await late.receive_nothing(timeout=0.2)
+
+            await late.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_vote_outside_room_deck(self):
+        """Test voting with a value outside the room deck is rejected."""
+        room = RoomFactory.create(deck="tshirt")
+        vote = VoteFactory.create(room=room)
+
+        async def scenario():
+            communicator = room_communicator(room.id, vote)
+            await communicator.connect()
+            choices = await receive_action(communicator, "get_vote_choices")
+            assert choices["vote_choices"][0] == {"label": "XS", "value": 1}
+
+            for value in (40, 1.0, True, [1], {"value": 1}):
+                await communicator.send_json_to({"action": "vote", "value": value})
+                data = await receive_action(communicator, "message")
+                assert data["message"] == "Invalid vote value."
+
+            await communicator.send_json_to({"action": "vote"})
+            data = await receive_action(communicator, "message")
+            assert data["message"] == "Invalid vote value."
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+        vote.refresh_from_db()
+        assert vote.value is None
+
+    def test_vote_without_voter_token(self):
+        """Test voting with a token not bound to a voter is rejected."""
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(vote.room_id)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+
+            await communicator.send_json_to(
+                {"action": "vote", "vote_id": vote.id, "value": 5}
+            )
+            data = await receive_action(communicator, "message")
+            assert data["code"] == "error"
+            assert await communicator.receive_nothing(timeout=0.2)
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+        vote.refresh_from_db()
+        assert vote.value is None
+
+    def test_vote_is_bound_to_token(self):
+        """Test a socket votes with the vote of its token only."""
+        room = RoomFactory.create()
+        vote, other_vote = VoteFactory.create_batch(2, room=room)
+
+        async def scenario():
+            communicator = room_communicator(room.id, vote)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+
+            await communicator.send_json_to(
+                {"action": "vote", "vote_id": other_vote.id, "value": 5}
+            )
+            data = await receive_action(communicator, "vote_cast")
+            assert data["votes"] == [{"voter": vote.voter, "voted": True}]
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+        vote.refresh_from_db()
+        other_vote.refresh_from_db()
+        assert (vote.value, other_vote.value) == (5, None)
+
+    def test_vote_cast_sequence_and_snapshot(self):
+        """Test vote deltas are numbered and a snapshot can be requested."""
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(vote.room_id, vote)
+            await communicator.connect()
+            snapshot = await receive_action(communicator, "refresh_votes")
+
+            deltas = []
+            for value in (3, 5):
+                await communicator.send_json_to({"action": "vote", "value": value})
+                deltas.append(await receive_action(communicator, "vote_cast"))
+            first, second = deltas
+            assert first["seq"] == snapshot["seq"] + 1
+            assert second["seq"] == first["seq"] + 1
+
+            await communicator.send_json_to({"action": "snapshot"})
+            data = await receive_action(communicator, "refresh_votes")
+            assert data["seq"] == second["seq"]
+            assert data["votes"] == [
+                {"voter": vote.voter, "voted": True, "online": False}
+            ]
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_votes_within_window_are_coalesced(self, settings):
+        """Test votes cast within the broadcast window are sent together."""
+        settings.VOTE_BROADCAST_WINDOW = 0.2
+        room = RoomFactory.create()
+        votes = VoteFactory.create_batch(3, room=room)
+
+        async def scenario():
+            communicators = [room_communicator(room.id, vote) for vote in votes]
+            for communicator in communicators:
+                await communicator.connect()
+                snapshot = await receive_action(communicator, "refresh_votes")
+            broadcasts = metrics.get("vote_cast_broadcasts_total")
+
+            for communicator in communicators:
+                await communicator.send_json_to({"action": "vote", "value": 1})
+
+            data = await receive_action(communicators[-1], "vote_cast")
+            assert data["seq"] == snapshot["seq"] + 1
+            assert {vote["voter"]: vote["voted"] for vote in data["votes"]} == {
+                vote.voter: True for vote in votes
+            }
+            assert metrics.get("vote_cast_broadcasts_total") == broadcasts + 1
+
+            for communicator in communicators:
+                await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_presence(self):
+        """Test heartbeats and disconnects are announced as presence changes."""
+        room = RoomFactory.create()
+        vote = VoteFactory.create(room=room)
+
+        async def scenario():
+            observer = room_communicator(room.id)
+            await observer.connect()
+            await receive_action(observer, "refresh_votes")
+
+            voter = room_communicator(room.id, vote)
+            await voter.connect()
+            await receive_action(voter, "refresh_votes")
+
+            await voter.send_json_to({"action": "heartbeat"})
+            data = await receive_action(observer, "presence")
+            assert data["voter"] == vote.voter
+            assert data["online"] is True
+
+            # A heartbeat of an online voter is not broadcast again
+            await voter.send_json_to({"action": "heartbeat"})
+            assert await observer.receive_nothing(timeout=0.2)
+
+            await voter.disconnect()
+            data = await receive_action(observer, "presence")
+            assert data["online"] is False
+
+            await observer.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_expired_presence_without_voter_sockets(self, settings):
+        """Test voters of other workers go offline where only admins are."""
+        settings.PRESENCE_TIMEOUT = 0.2
+        room = RoomFactory.create()
+        vote = VoteFactory.create(room=room)
+
+        async def scenario():
+            admin = room_communicator(room.id)
+            await admin.connect()
+            await receive_action(admin, "refresh_votes")
+
+            # Presence announced by the worker of the voter, which then stops
+            await get_channel_layer().group_send(
+                get_room_group_name(room.id),
+                {
+                    "type": "presence_message",
+                    "event_id": uuid.uuid4().hex,
+                    "changes": [
+                        {
+                            "kind": "presence",
+                            "vote_id": vote.id,
+                            "voter": vote.voter,
+                            "expires_at": time.time() + 0.2,
+                        }
+                    ],
+                },
+            )
+            assert (await receive_action(admin, "presence"))["online"] is True
+
+            data = await receive_action(admin, "presence")
+            assert data["voter"] == vote.voter
+            assert data["online"] is False
+
+            await admin.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_connect_while_last_socket_leaves(self, monkeypatch):
+        """Test a room state dropped while connecting is not used again."""
+        room = RoomFactory.create()
+        load_room = PlanningPokerConsumer.load_room
+
+        async def scenario():
+            first = room_communicator(room.id)
+            await first.connect()
+            await receive_action(first, "refresh_votes")
+            stale = room_states.get(str(room.id))
+
+            async def leave_and_load_room(consumer):
+                await first.disconnect()
+                return await load_room(consumer)
+
+            # The deck is read again while the first socket leaves
+            room_decks.invalidate(room.id)
+            monkeypatch.setattr(PlanningPokerConsumer, "load_room", leave_and_load_room)
+            second = room_communicator(room.id)
+            await second.connect()
+            await receive_action(second, "refresh_votes")
+
+            room_state = room_states.get(str(room.id))
+            assert room_state is not stale
+            assert not room_state.sweeper.done()
+
+            await second.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_join_is_announced_to_room(self, client):
+        """Test a voter joining through the API shows up in the room."""
+        room = RoomFactory.create(password="")
+
+        async def scenario():
+            communicator = room_communicator(room.id)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+
+            await database_sync_to_async(client.post)(
+                "/api/join-room",
+                {"room": str(room.id), "password": "", "voter": "Voter1"},
+            )
+
+            data = await receive_action(communicator, "vote_cast")
+            assert data["votes"] == [{"voter": "Voter1", "voted": False}]
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_actions_beyond_rate_limit_are_dropped(self, settings):
+        """Test actions beyond the socket rate limit are dropped."""
+        settings.SOCKET_RATE_LIMIT = 0.001
+        settings.SOCKET_RATE_BURST = 2
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(vote.room_id, vote)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+            limited = metrics.get(
+                "consumer_rate_limited_total", scope="socket", action="snapshot"
+            )
+
+            for _ in range(4):
+                await communicator.send_json_to({"action": "snapshot"})
+
+            for _ in range(2):
+                await receive_action(communicator, "refresh_votes")
+            data = await receive_action(communicator, "message")
+            assert data["message"] == "Too many actions, slow down."
+            assert await communicator.receive_nothing(timeout=0.2)
+            assert (
+                metrics.get(
+                    "consumer_rate_limited_total", scope="socket", action="snapshot"
+                )
+                == limited + 2
+            )
+
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_oversized_frame_closes_socket(self, settings):
+        """Test a frame above the size limit closes the socket."""
+        settings.MAX_FRAME_SIZE = 100
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(vote.room_id, vote)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+
+            await communicator.send_to(text_data="x" * 101)
+            assert (await communicator.receive_output())["code"] == 1009
+
+        async_to_sync(scenario)()
+
+    def test_binary_frame_closes_socket(self):
+        """Test a binary frame closes the socket as unsupported."""
+        vote = VoteFactory.create()
+
+        async def scenario():
+            communicator = room_communicator(vote.room_id, vote)
+            await communicator.connect()
+            await receive_action(communicator, "refresh_votes")
+
+            await communicator.send_to(bytes_data=b"{}")
+            assert (await communicator.receive_output())["code"] == 1003
+
+        async_to_sync(scenario)()
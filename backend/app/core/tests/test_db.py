@@ -0,0 +1,41 @@
+"""
+Core consumer database access tests.
+"""
+
+import pytest
+
+from django.db import connections
+
+from core.db import close_db_executor, get_db_executor
+
+
+class TestDbExecutor:
+    """Consumer database pool tests."""
+
+    def test_pool_threads_keep_connections_open(self, settings):
+        """Test only consumer pool threads keep their connections open."""
+        settings.CONSUMER_DB_CONN_MAX_AGE = 30
+
+        def conn_max_age():
+            return connections["default"].settings_dict["CONN_MAX_AGE"]
+
+        assert get_db_executor().submit(conn_max_age).result() == 30
+        assert conn_max_age() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_close_db_executor_closes_connections(self):
+        """Test closing the pool closes the connections its threads keep open."""
+
+        def open_connection():
+            connection = connections["default"]
+            connection.ensure_connection()
+            return connection
+
+        executor = get_db_executor()
+        opened = [executor.submit(open_connection) for _ in range(4)]
+        pool_connections = [future.result() for future in opened]
+        assert all(connection.connection for connection in pool_connections)
+
+        close_db_executor()
+
+        assert not any(connection.connection for connection in pool_connections)
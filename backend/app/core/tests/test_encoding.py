@@ -0,0 +1,50 @@
+"""
+Core encoding tests.
+"""
+
+import msgpack
+
+from core.encoding import columnar, encode, get_subprotocol
+
+
+class TestEncoding:
+    """Frame encoding tests."""
+
+    def test_columnar(self):
+        """Test lists of objects with the same keys are sent as columns."""
+        data = {
+            "action": "refresh_votes",
+            "votes": [
+                {"voter": "Voter1", "voted": True},
+                {"voter": "Voter2", "voted": False},
+            ],
+            "mixed": [{"voter": "Voter1"}, {"value": 1}],
+            "empty": [],
+            "stats": {"mode": 5},
+        }
+
+        assert columnar(data) == {
+            "action": "refresh_votes",
+            "votes": {"voter": ["Voter1", "Voter2"], "voted": [True, False]},
+            "mixed": [{"voter": "Voter1"}, {"value": 1}],
+            "empty": [],
+            "stats": {"mode": 5},
+        }
+
+    def test_encode(self):
+        """Test encoding a payload in every frame format."""
+        data = {"votes": [{"voter": "Voter1", "voted": True}]}
+
+        assert encode(data) == '{"votes":[{"voter":"Voter1","voted":true}]}'
+        assert (
+            encode(data, "compact") == '{"votes":{"voter":["Voter1"],"voted":[true]}}'
+        )
+        assert msgpack.unpackb(encode(data, "msgpack")) == columnar(data)
+
+    def test_get_subprotocol(self):
+        """Test the first supported subprotocol a client asks for is chosen."""
+        assert get_subprotocol(["chat", "poker.compact", "poker.json"]) == (
+            "poker.compact"
+        )
+        assert get_subprotocol(["chat"]) is None
+        assert get_subprotocol([]) is None
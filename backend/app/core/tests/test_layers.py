@@ -0,0 +1,144 @@
+"""
+Core channel layers tests.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from asgiref.sync import async_to_sync
+from channels_redis.core import RedisChannelLayer
+
+from core.layers import HybridChannelLayer, ShardedRedisChannelLayer
+
+
+@pytest.fixture
+def redis_sends(monkeypatch):
+    """Replace the Redis round trips of group membership and sends."""
+    sends = []
+
+    async def group_membership(self, group, channel):
+        pass
+
+    async def group_send(self, group, message):
+        channels = [*self.local_groups.get(group, ()), "specific.remote!channel"]
+        sends.append(self._map_channel_keys_to_connection(channels, message)[1])
+
+    monkeypatch.setattr(RedisChannelLayer, "group_add", group_membership)
+    monkeypatch.setattr(RedisChannelLayer, "group_discard", group_membership)
+    monkeypatch.setattr(RedisChannelLayer, "group_send", group_send)
+    return sends
+
+
+class TestShardedRedisChannelLayer:
+    """Sharded Redis channel layer tests."""
+
+    def test_adding_host_moves_only_its_groups(self):
+        """Test a new host takes groups from the others without moving the rest."""
+        hosts = [f"redis://redis{number}:6379" for number in range(5)]
+        before = ShardedRedisChannelLayer(hosts=hosts[:4])
+        after = ShardedRedisChannelLayer(hosts=hosts)
+        groups = [f"room_{number}" for number in range(1000)]
+
+        moved = [
+            group
+            for group in groups
+            if before.hosts[before.consistent_hash(group)]
+            != after.hosts[after.consistent_hash(group)]
+        ]
+
+        # Check only the new host got groups, about a fifth of them
+        assert {after.consistent_hash(group) for group in moved} == {4}
+        assert 150 < len(moved) < 250
+
+    def test_single_host(self):
+        """Test every group is placed on the only host."""
+        layer = ShardedRedisChannelLayer(hosts=["redis://redis:6379"])
+
+        assert layer.consistent_hash("room_1") == 0
+
+
+class TestHybridChannelLayer:
+    """Hybrid channel layer tests."""
+
+    def test_group_send_to_local_channels(self, redis_sends):
+        """Test local group members receive without Redis, others through it."""
+        layer = HybridChannelLayer()
+
+        async def scenario():
+            channels = [await layer.new_channel() for _ in range(2)]
+            for channel in channels:
+                await layer.group_add("room", channel)
+            await layer.group_discard("room", channels[1])
+
+            await layer.group_send("room", {"type": "vote_cast"})
+
+            assert await layer.receive(channels[0]) == {"type": "vote_cast"}
+            assert layer.receive_buffer[channels[1]].empty()
+
+        async_to_sync(scenario)()
+
+        assert [list(keys) for keys in redis_sends] == [["asgispecific.remote!"]]
+
+    def test_group_send_to_reading_channel(self, redis_sends):
+        """Test the channel reading from Redis is sent to through Redis."""
+        layer = HybridChannelLayer()
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add("room", channel)
+            layer.reading_channel = channel
+
+            await layer.group_send("room", {"type": "vote_cast"})
+
+            assert layer.receive_buffer[channel].empty()
+
+        async_to_sync(scenario)()
+
+        assert len(redis_sends[0]) == 2
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_REDIS_URL"), reason="TEST_REDIS_URL is not set"
+)
+class TestHybridChannelLayerWithRedis:
+    """Hybrid channel layer tests against the Redis at TEST_REDIS_URL."""
+
+    def test_group_send_keeps_order(self):
+        """Test every local and remote member receives group messages in order."""
+        hosts = [os.environ["TEST_REDIS_URL"]]
+        messages = 50
+
+        async def consume(layer, channel):
+            return [(await layer.receive(channel))["number"] for _ in range(messages)]
+
+        async def scenario():
+            local = HybridChannelLayer(hosts=hosts, prefix="test-hybrid")
+            remote = HybridChannelLayer(hosts=hosts, prefix="test-hybrid")
+            try:
+                channels = [
+                    (layer, await layer.new_channel())
+                    for layer in (local, local, local, remote)
+                ]
+                for layer, channel in channels:
+                    await layer.group_add("room", channel)
+
+                consumers = [
+                    asyncio.create_task(consume(layer, channel))
+                    for layer, channel in channels
+                ]
+                for number in range(messages):
+                    await local.group_send("room", {"type": "test", "number": number})
+                    if number % 5 == 0:
+                        await asyncio.sleep(0.01)
+
+                received = await asyncio.wait_for(asyncio.gather(*consumers), 30)
+                assert received == [list(range(messages))] * len(channels)
+                assert not local.pending
+            finally:
+                await local.flush()
+                await local.close_pools()
+                await remote.close_pools()
+
+        async_to_sync(scenario)()
@@ -0,0 +1,63 @@
+"""
+Core metrics tests.
+"""
+
+from core.metrics import Metrics
+
+
+class TestMetrics:
+    """Metrics tests."""
+
+    def test_counters(self):
+        """Test counters are kept per name and labels."""
+        metrics = Metrics()
+
+        metrics.increment("frames_total", action="vote")
+        metrics.increment("frames_total", 2, action="vote")
+        metrics.increment("frames_total", action="reset")
+
+        assert metrics.get("frames_total", action="vote") == 3
+        assert metrics.get("frames_total", action="reset") == 1
+        assert metrics.get("frames_total") == 0
+
+    def test_histograms(self):
+        """Test observed values are counted in their buckets."""
+        metrics = Metrics()
+
+        for value in (0.001, 0.002, 0.3, 10):
+            metrics.observe("action_seconds", value, action="vote")
+
+        histogram = metrics.get_histogram("action_seconds", action="vote")
+        assert histogram.count == 4
+        assert histogram.counts[0] == 1
+        assert histogram.counts[1] == 1
+        assert histogram.counts[-1] == 1
+
+    def test_render(self):
+        """Test metrics are rendered in the Prometheus text format."""
+        metrics = Metrics()
+        metrics.increment("frames_total", action="vote")
+        metrics.observe("action_seconds", 0.02, action="vote")
+
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE frames_total counter" in lines
+        assert 'frames_total{action="vote"} 1' in lines
+        assert "# TYPE action_seconds histogram" in lines
+        assert 'action_seconds_bucket{action="vote",le="0.01"} 0' in lines
+        assert 'action_seconds_bucket{action="vote",le="0.025"} 1' in lines
+        assert 'action_seconds_bucket{action="vote",le="+Inf"} 1' in lines
+        assert 'action_seconds_count{action="vote"} 1' in lines
+
+    def test_disabled(self, settings):
+        """Test nothing is recorded while metrics are disabled."""
+        settings.METRICS_ENABLED = False
+        metrics = Metrics()
+
+        metrics.increment("frames_total")
+        metrics.observe("action_seconds", 0.02)
+        with metrics.timer("action_seconds"):
+            pass
+
+        assert metrics.counters == {}
+        assert metrics.histograms == {}
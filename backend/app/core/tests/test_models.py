@@ -2,10 +2,19 @@
 Core models tests.
 """
 
+import uuid
+from datetime import timedelta
+
 import pytest
 
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db import IntegrityError
+from django.utils import timezone
+
+from core.decks import DECKS, Deck, RoomDeckCache, room_decks
 from core.models import (
     Room,
+    Round,
     Vote,
 )
 from core.tests.factories import (
@@ -32,6 +41,105 @@ class TestRoom:
 
         assert Room.objects.all().count() == 1
         assert room.check_password(password)
+        assert not room.check_password("")
+
+    def test_empty_password_is_not_hashed(self):
+        """Test an empty room password is stored without hashing."""
+        room = Room.objects.create_room(password="")
+
+        assert room.password == ""
+        assert room.check_password("")
+        assert not room.check_password("SamplePassword123")
+
+    def test_password_with_configured_iterations(self, settings):
+        """Test room passwords are hashed with the configured work factor."""
+        settings.ROOM_PASSWORD_ITERATIONS = 1000
+        room = Room.objects.create_room(password="SamplePassword123")
+
+        assert room.password.startswith("pbkdf2_sha256$1000$")
+        assert room.check_password("SamplePassword123")
+
+    def test_password_hashed_before(self):
+        """Test passwords hashed before the room hasher changed still verify."""
+        room = RoomFactory.create()
+        room.password = PBKDF2PasswordHasher().encode("", "SampleSalt")
+
+        assert room.check_password("")
+        assert not room.check_password("SamplePassword123")
+
+    def test_next_round(self):
+        """Test starting next room round."""
+        room = RoomFactory.create()
+
+        assert Room.objects.next_round(room.id) == 2
+
+        room.refresh_from_db()
+        assert room.round == 2
+
+    def test_next_round_records_activity(self):
+        """Test starting next room round records the room activity."""
+        room = RoomFactory.create(last_activity=timezone.now() - timedelta(days=1))
+
+        Room.objects.next_round(room.id)
+
+        room.refresh_from_db()
+        assert room.last_activity > timezone.now() - timedelta(minutes=1)
+
+    def test_touch(self):
+        """Test recording activity in a room."""
+        room = RoomFactory.create(last_activity=timezone.now() - timedelta(days=1))
+
+        assert Room.objects.touch(room.id) == 1
+
+        room.refresh_from_db()
+        assert room.last_activity > timezone.now() - timedelta(minutes=1)
+
+    def test_reveal_round(self):
+        """Test marking a room round as revealed records the room activity."""
+        room = RoomFactory.create(last_activity=timezone.now() - timedelta(days=1))
+
+        assert Room.objects.reveal_round(room.id, 1) == 1
+
+        room.refresh_from_db()
+        assert room.revealed_round == 1
+        assert room.last_activity > timezone.now() - timedelta(minutes=1)
+
+    def test_next_round_of_non_existing_room(self):
+        """Test starting next round of non existing room."""
+        assert Room.objects.next_round(uuid.uuid4()) is None
+
+    def test_room_deck_cache(self):
+        """Test the room deck is cached until the room is saved."""
+        room = Room.objects.create_room(deck="powers_of_two")
+        room_decks.set(room.id, room.get_deck())
+
+        assert room_decks.get_cached(room.id).choices == DECKS["powers_of_two"]
+        assert 16 in room_decks.get_cached(room.id)
+        assert 3 not in room_decks.get_cached(room.id)
+
+        room.deck = "tshirt"
+        room.save()
+
+        assert room_decks.get_cached(room.id) is None
+
+    def test_room_deck_cache_of_non_existing_room(self):
+        """Test the deck of non existing room is None."""
+        assert room_decks.get_cached("NoExistingRoomId") is None
+        assert room_decks.get_cached(uuid.uuid4()) is None
+
+    def test_room_deck_cache_size(self):
+        """Test only the most recently used room decks are kept."""
+        decks = RoomDeckCache(maxsize=2)
+        first, second, third = (uuid.uuid4() for _ in range(3))
+        for room_id in (first, second):
+            decks.set(room_id, Deck(DECKS["tshirt"]))
+
+        decks.get_cached(first)
+        decks.set(third, Deck(DECKS["tshirt"]))
+
+        assert decks.get_cached(first) is not None
+        assert decks.get_cached(second) is None
+        assert decks.get_cached(third) is not None
 
 
 @pytest.mark.django_db
@@ -49,6 +157,13 @@ class TestVote:
         assert vote.room.id == room.id
         assert vote.value is None
 
+    def test_create_vote_with_reserved_voter(self):
+        """Test creating vote with voter name already reserved in the room."""
+        vote = VoteFactory.create()
+
+        with pytest.raises(IntegrityError):
+            Vote.objects.create(room=vote.room, voter=vote.voter)
+
     def test_update_vote(self):
         """Test update vote."""
         vote = VoteFactory.create()
@@ -57,3 +172,50 @@ class TestVote:
         vote.save()
 
         assert vote.value == new_vote_value
+
+    def test_cast_vote(self):
+        """Test casting vote with a single statement."""
+        vote = VoteFactory.create()
+
+        assert Vote.objects.cast_vote(vote.room_id, vote.id, 5) == (vote.id, vote.voter)
+
+        vote.refresh_from_db()
+        assert vote.value == 5
+
+    def test_cast_vote_in_other_room(self):
+        """Test casting vote is scoped to the vote room."""
+        vote = VoteFactory.create()
+        other_room = RoomFactory.create()
+
+        assert Vote.objects.cast_vote(other_room.id, vote.id, 5) is None
+
+        vote.refresh_from_db()
+        assert vote.value is None
+
+    def test_cast_vote_in_current_round(self):
+        """Test casting vote records the current room round."""
+        vote = VoteFactory.create()
+        Room.objects.next_round(vote.room_id)
+
+        Vote.objects.cast_vote(vote.room_id, vote.id, 3)
+
+        vote.refresh_from_db()
+        assert (vote.value, vote.round) == (3, 2)
+
+
+@pytest.mark.django_db
+class TestRound:
+    """Round model tests."""
+
+    def test_save_round(self):
+        """Test saving a round replaces the record of an earlier reveal."""
+        room = RoomFactory.create()
+        stats = {"average": 5.0, "median": 5.0, "mode": 5, "agreement": 100.0}
+
+        Round.objects.save_round(room.id, 1, {"Voter1": 5}, stats)
+        Round.objects.save_round(room.id, 1, {"Voter1": 3}, {**stats, "mode": 3})
+        Round.objects.save_round(room.id, 2, {}, stats)
+
+        round = Round.objects.get(room=room, number=1)
+        assert (round.values, round.mode) == ({"Voter1": 3}, 3)
+        assert room.rounds.count() == 2
@@ -0,0 +1,24 @@
+"""
+Core rate limiting tests.
+"""
+
+from core.ratelimit import TokenBucket
+
+
+class TestTokenBucket:
+    """Token bucket tests."""
+
+    def test_consume(self, monkeypatch):
+        """Test a bucket allows its burst and refills at its rate."""
+        now = [100.0]
+        monkeypatch.setattr("core.ratelimit.time.monotonic", lambda: now[0])
+        bucket = TokenBucket(rate=2, burst=3)
+
+        assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+
+        now[0] += 0.5
+        assert bucket.consume()
+        assert not bucket.consume()
+
+        now[0] += 10
+        assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
@@ -0,0 +1,166 @@
+"""
+Core room state tests.
+"""
+
+import json
+
+from core.state import RoomState, RoomStateRegistry
+
+
+class TestRoomState:
+    """Room state tests."""
+
+    def test_vote_lists(self):
+        """Test hidden and final vote lists of a loaded state."""
+        state = RoomState("room", [(1, "Voter1", 5), (2, "Voter2", None)])
+
+        assert state.get_hidden_vote_list() == [
+            {"voter": "Voter1", "voted": True, "online": False},
+            {"voter": "Voter2", "voted": False, "online": False},
+        ]
+        assert state.get_final_vote_list() == [
+            {"voter": "Voter1", "value": 5, "voted": True, "online": False},
+            {"voter": "Voter2", "value": None, "voted": False, "online": False},
+        ]
+
+    def test_apply_changes(self):
+        """Test applying join, vote and reset changes."""
+        state = RoomState("room", [(1, "Voter1", None)])
+
+        state.apply("a", [{"kind": "join", "vote_id": 2, "voter": "Voter2"}])
+        state.apply(
+            "b", [{"kind": "vote", "vote_id": 2, "voter": "Voter2", "value": 8}]
+        )
+
+        assert state.votes[2] == {"voter": "Voter2", "value": 8}
+
+        state.apply("c", [{"kind": "reset", "round": 2}])
+
+        assert all(vote["value"] is None for vote in state.votes.values())
+        assert state.round == 2
+        assert state.version == 3
+
+    def test_stats(self):
+        """Test round statistics follow the applied changes."""
+        state = RoomState("room", [(1, "Voter1", 3), (2, "Voter2", 5), (3, "V3", 5)])
+
+        assert state.get_stats() == {
+            "votes": 3,
+            "average": 13 / 3,
+            "median": 5,
+            "mode": 5,
+            "agreement": 200 / 3,
+        }
+
+        state.apply("a", [{"kind": "vote", "vote_id": 3, "voter": "V3", "value": 8}])
+
+        assert state.get_stats()["median"] == 5
+        assert state.get_stats()["mode"] == 3
+        assert state.counts == {3: 1, 5: 1, 8: 1}
+
+        state.apply("b", [{"kind": "reset", "round": 2}])
+
+        assert state.get_stats() == {
+            "votes": 0,
+            "average": None,
+            "median": None,
+            "mode": None,
+            "agreement": None,
+        }
+
+    def test_apply_batch(self):
+        """Test a batch of changes produces a single version."""
+        state = RoomState("room", [(1, "Voter1", None), (2, "Voter2", None)])
+
+        version = state.apply(
+            "a",
+            [
+                {"kind": "vote", "vote_id": 1, "voter": "Voter1", "value": 3},
+                {"kind": "vote", "vote_id": 2, "voter": "Voter2", "value": 5},
+            ],
+        )
+
+        assert version == 1
+        assert [vote["value"] for vote in state.votes.values()] == [3, 5]
+
+    def test_apply_event_once(self):
+        """Test that an event delivered twice is applied once."""
+        state = RoomState("room", [(1, "Voter1", None)])
+        votes = [{"kind": "vote", "vote_id": 1, "voter": "Voter1", "value": 3}]
+
+        assert state.apply("a", votes) == 1
+        state.apply("b", [{"kind": "reset", "round": 2}])
+
+        # A lagging consumer delivering the vote again must not undo the reset
+        assert state.apply("a", votes) == 1
+        assert state.votes[1]["value"] is None
+        assert state.version == 2
+
+    def test_presence(self):
+        """Test presence changes are only reported when the status changes."""
+        state = RoomState("room", [(1, "Voter1", None)])
+        online = {"kind": "presence", "vote_id": 1, "voter": "Voter1"}
+
+        assert state.apply("a", [{**online, "expires_at": 100}]) == 1
+        # Refreshing an online voter extends the expiry without a new version
+        assert state.apply("b", [{**online, "expires_at": 200}]) is None
+        assert state.get_hidden_vote_list()[0]["online"] is True
+        assert state.get_expired_presence(150) == []
+        assert state.get_expired_presence(200) == [1]
+
+        assert state.apply("c", [{**online, "expires_at": None}]) == 2
+        assert state.apply("d", [{**online, "expires_at": None}]) is None
+        assert state.get_hidden_vote_list()[0]["online"] is False
+
+    def test_reveal(self):
+        """Test a reveal is kept until a vote or reset makes it stale."""
+        state = RoomState("room", [(1, "Voter1", 5)])
+        reveal = {
+            "kind": "reveal",
+            "votes": state.get_final_vote_list(),
+            "stats": state.get_stats(),
+        }
+
+        assert state.apply("a", [reveal]) == 1
+        assert state.reveal["stats"]["mode"] == 5
+
+        state.apply(
+            "b", [{"kind": "vote", "vote_id": 1, "voter": "Voter1", "value": 3}]
+        )
+        assert state.reveal is None
+
+        state.apply("c", [reveal])
+        state.apply("d", [{"kind": "reset", "round": 2}])
+        assert state.reveal is None
+
+    def test_get_frame_encodes_once(self):
+        """Test the frame of an event is encoded once and then shared."""
+        state = RoomState("room")
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {"action": "reveal_votes", "votes": []}
+
+        frame = state.get_frame("a", build)
+
+        assert state.get_frame("a", build) is frame
+        assert json.loads(frame) == {"action": "reveal_votes", "votes": []}
+        assert len(builds) == 1
+
+
+class TestRoomStateRegistry:
+    """Room state registry tests."""
+
+    def test_acquire_and_release(self):
+        """Test that consumers share a state until the last one releases it."""
+        registry = RoomStateRegistry()
+        state = registry.acquire(RoomState("room"))
+
+        assert registry.acquire(RoomState("room")) is state
+
+        registry.release("room")
+        assert registry.get("room") is state
+
+        registry.release("room")
+        assert registry.get("room") is None
@@ -0,0 +1,56 @@
+"""
+Core room access tokens.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core import signing
+
+ROOM_TOKEN_SALT = "core.room-access"
+
+
+def make_room_token(room_id, vote_id=None, voter=None):
+    """
+    Return a signed token proving access to a room, optionally
+    bound to one of its voters.
+    """
+    return signing.dumps(
+        {"room": str(room_id), "vote": vote_id, "voter": voter}, salt=ROOM_TOKEN_SALT
+    )
+
+
+def load_room_token(token, room_id, max_age):
+    """
+    Return the payload of a room token if it is valid, not older than
+    max_age seconds and issued for the given room, otherwise None.
+    """
+    try:
+        payload = signing.loads(token, salt=ROOM_TOKEN_SALT, max_age=max_age)
+        if uuid.UUID(payload["room"]) != uuid.UUID(str(room_id)):
+            return None
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+    return payload
+
+
+def check_room_token(token, room_id):
+    """
+    Return the payload of a room token if it is valid, not expired and
+    issued for the given room, otherwise None.
+    """
+    return load_room_token(token, room_id, settings.ROOM_TOKEN_MAX_AGE)
+
+
+def check_voter_token(token, room_id):
+    """
+    Return the payload of a token bound to a voter of the given room even
+    if it has expired, otherwise None. It only names the voter, access to
+    the room is granted by check_room_token() or the room password.
+    """
+    payload = load_room_token(token, room_id, None)
+    if payload is None or payload.get("vote") is None:
+        return None
+
+    return payload
@@ -8,5 +8,12 @@ from core.api import views
 
 urlpatterns = [
     path("create-room", views.CreateRoomAPIView.as_view(), name="create-room"),
+    path("create-rooms", views.CreateRoomsAPIView.as_view(), name="create-rooms"),
     path("join-room", views.JoinRoomAPIView.as_view(), name="join-room"),
+    path(
+        "rooms/<uuid:room_id>/history",
+        views.RoomHistoryAPIView.as_view(),
+        name="room-history",
+    ),
+    path("metrics", views.MetricsAPIView.as_view(), name="metrics"),
 ]
@@ -29,7 +29,12 @@ const CreateRoom = ({ visible, onHide }) => {
       hideDialog();
       localStorage.setItem(
         response.data.id,
-        JSON.stringify({ isAdmin: true, voterId: null }),
+        JSON.stringify({
+          isAdmin: true,
+          voterId: null,
+          token: response.data.token,
+          worker: response.data.worker,
+        }),
       );
       router.push({
         pathname: '/[roomId]',
@@ -5,30 +5,57 @@ import { Toast } from 'primereact/toast';
 import { DataTable } from 'primereact/datatable';
 import { Column } from 'primereact/column';
 import CopyUrl from '@/components/CopyUrl';
-import { getWsRoomUrl } from '@/api/ws';
+import { decodeFrame, getWsRoomUrl, ROOM_SUBPROTOCOLS } from '@/api/ws';
 
-const Game = ({ isAdmin, roomId, voterId }) => {
+const HEARTBEAT_INTERVAL = 20000;
+// Close code of a socket whose room token is invalid or expired
+const INVALID_TOKEN_CODE = 4003;
+
+const Game = ({ isAdmin, roomId, voterId, token, worker, onExpired }) => {
   const [voteChoices, setVoteChoices] = useState([]);
   const [selectedValue, setSelectedValue] = useState(null);
   const [endGame, setEndGame] = useState(false);
   const [votes, setVotes] = useState([]);
+  const [stats, setStats] = useState(null);
   const router = useRouter();
   const toast = useRef(null);
   const ws = useRef(null);
+  const seq = useRef(0);
 
   function capitalizeFirstLetter(string) {
     return string.charAt(0).toUpperCase() + string.slice(1);
   }
 
+  function mergeVotes(votes, changed) {
+    const merged = [...votes];
+    changed.forEach((vote) => {
+      const index = merged.findIndex((v) => v.voter === vote.voter);
+      if (index === -1) merged.push(vote);
+      else merged[index] = { ...merged[index], ...vote };
+    });
+    return merged;
+  }
+
   useEffect(() => {
-    ws.current = new WebSocket(getWsRoomUrl(roomId));
+    ws.current = new WebSocket(
+      getWsRoomUrl(roomId, token, worker),
+      ROOM_SUBPROTOCOLS,
+    );
+
+    let heartbeat = null;
+    const sendHeartbeat = () =>
+      ws.current.send(JSON.stringify({ action: 'heartbeat' }));
 
     ws.current.onopen = () => {
       console.log('Websocket connected:');
+      if (voterId) {
+        sendHeartbeat();
+        heartbeat = setInterval(sendHeartbeat, HEARTBEAT_INTERVAL);
+      }
     };
 
     ws.current.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      const data = decodeFrame(JSON.parse(event.data));
 
       if (data.error) {
         router.push('/');
@@ -43,16 +70,41 @@ const Game = ({ isAdmin, roomId, voterId }) => {
           showToast(data.code, capitalizeFirstLetter(data.code), data.message);
           break;
         case 'refresh_votes':
+          seq.current = data.seq;
           setVotes(data.votes);
           break;
+        case 'vote_cast':
+          if (data.seq <= seq.current) break;
+          if (data.seq !== seq.current + 1) {
+            ws.current.send(JSON.stringify({ action: 'snapshot' }));
+            break;
+          }
+          seq.current = data.seq;
+          setVotes((votes) => mergeVotes(votes, data.votes));
+          break;
+        case 'presence':
+          if (data.seq <= seq.current) break;
+          if (data.seq !== seq.current + 1) {
+            ws.current.send(JSON.stringify({ action: 'snapshot' }));
+            break;
+          }
+          seq.current = data.seq;
+          setVotes((votes) =>
+            mergeVotes(votes, [{ voter: data.voter, online: data.online }]),
+          );
+          break;
         case 'reveal_votes':
           showToast('success', 'Reveal votes', data.message);
+          seq.current = data.seq;
           setVotes(data.votes);
+          setStats(data.stats);
           setEndGame(true);
           break;
         case 'reset_votes':
           showToast('success', 'Reset votes', data.message);
+          seq.current = data.seq;
           setVotes(data.votes);
+          setStats(null);
           setEndGame(false);
           setSelectedValue(null);
           break;
@@ -61,10 +113,16 @@ const Game = ({ isAdmin, roomId, voterId }) => {
       }
     };
 
+    ws.current.onclose = (event) => {
+      clearInterval(heartbeat);
+      if (event.code === INVALID_TOKEN_CODE) onExpired(token);
+    };
+
     return () => {
+      clearInterval(heartbeat);
       ws.current.close();
     };
-  }, [roomId, router]);
+  }, [roomId, voterId, token, worker, router, onExpired]);
 
   const showToast = (type, title, detail) => {
     toast.current.show({
@@ -80,7 +138,6 @@ const Game = ({ isAdmin, roomId, voterId }) => {
 
     const voteData = {
       action: 'vote',
-      vote_id: voterId,
       value: value,
     };
 
@@ -147,6 +204,11 @@ const Game = ({ isAdmin, roomId, voterId }) => {
         <h2>Votes</h2>
         <DataTable value={votes} tableStyle={{ minWidth: '50rem' }}>
           <Column field='voter' header='Voter'></Column>
+          <Column
+            field='online'
+            header='Online'
+            body={(rowData) => (rowData.online ? 'Yes' : 'No')}
+          />
           <Column
             field='voted'
             header='Voted'
@@ -155,9 +217,20 @@ const Game = ({ isAdmin, roomId, voterId }) => {
           <Column
             field='value'
             header='Value'
-            body={(rowData) => (rowData.value ? rowData.value : 'Hidden')}
+            body={(rowData) =>
+              rowData.value != null
+                ? voteChoices.find((choice) => choice.value === rowData.value)
+                    ?.label ?? rowData.value
+                : 'Hidden'
+            }
           />
         </DataTable>
+        {stats && stats.votes > 0 && (
+          <p>
+            Average: {stats.average.toFixed(1)} | Median: {stats.median} |
+            Mode: {stats.mode} | Agreement: {Math.round(stats.agreement)}%
+          </p>
+        )}
       </div>
       <br />
 
@@ -6,7 +6,7 @@ import { Button } from 'primereact/button';
 import { InputText } from 'primereact/inputtext';
 import api from '@//api/root';
 
-const JoinRoom = ({ visible, onHide }) => {
+const JoinRoom = ({ visible, token, onHide }) => {
   const router = useRouter();
   const [roomId, setRoomId] = useState(null);
   const [password, setPassword] = useState('');
@@ -30,16 +30,26 @@ const JoinRoom = ({ visible, onHide }) => {
   const handleSubmit = async () => {
     setErrors({});
     try {
+      // A token from an earlier visit lets the room skip the password,
+      // an expired one of a voter lets it join again under its name
+      // with the password
+      const roomStorageData = JSON.parse(localStorage.getItem(roomId));
       const response = await api.post('join-room', {
         room: roomId,
         password,
+        token: roomStorageData?.token ?? token ?? undefined,
         voter,
       });
       showToast('success', 'Joined the room', `Voter ID: ${response.data.id}`);
       hideDialog();
       localStorage.setItem(
         roomId,
-        JSON.stringify({ isAdmin: false, voterId: response.data.id }),
+        JSON.stringify({
+          isAdmin: false,
+          voterId: response.data.id,
+          token: response.data.token,
+          worker: response.data.worker,
+        }),
       );
       router.push({ pathname: '/[roomId]', query: { roomId: roomId } });
     } catch (error) {
@@ -1,4 +1,4 @@
-import { useEffect, useState, useRef } from 'react';
+import { useCallback, useEffect, useState, useRef } from 'react';
 import { useRouter } from 'next/router';
 import { Toast } from 'primereact/toast';
 import JoinRoom from '@/components/JoinRoom';
@@ -8,6 +8,9 @@ const GamePage = () => {
   const [joinDialog, setJoinDialog] = useState(false);
   const [isAdmin, setIsAdmin] = useState(false);
   const [voterId, setVoterId] = useState(null);
+  const [token, setToken] = useState(null);
+  const [worker, setWorker] = useState(null);
+  const [expiredToken, setExpiredToken] = useState(null);
   const router = useRouter();
   const toast = useRef(null);
 
@@ -17,23 +20,50 @@ const GamePage = () => {
 
     const roomStorageData = JSON.parse(localStorage.getItem(roomId));
 
-    if (roomStorageData) {
+    // Rooms stored before tokens were issued have to be joined again
+    if (roomStorageData?.token) {
       setIsAdmin(roomStorageData.isAdmin);
       setVoterId(roomStorageData.voterId);
+      setToken(roomStorageData.token);
+      setWorker(roomStorageData.worker);
     } else {
       setJoinDialog(true);
     }
   }, [router.query]);
 
+  // The room rejected the stored token, a voter token lets it join again
+  const onExpired = useCallback(
+    (expired) => {
+      localStorage.removeItem(router.query.roomId);
+      setToken(null);
+      setExpiredToken(expired);
+      setJoinDialog(true);
+      toast.current.show({
+        severity: 'warn',
+        summary: 'Session expired',
+        detail: 'Join the room again',
+        life: 3000,
+      });
+    },
+    [router.query.roomId],
+  );
+
   return (
     <div>
       <Toast ref={toast} />
-      <JoinRoom visible={joinDialog} onHide={() => setJoinDialog(false)} />
-      {(isAdmin || voterId) && (
+      <JoinRoom
+        visible={joinDialog}
+        token={expiredToken}
+        onHide={() => setJoinDialog(false)}
+      />
+      {token && (isAdmin || voterId) && (
         <Game
           roomId={router.query.roomId}
           isAdmin={isAdmin}
           voterId={voterId}
+          token={token}
+          worker={worker}
+          onExpired={onExpired}
         />
       )}
     </div>
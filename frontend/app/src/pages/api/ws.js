@@ -2,4 +2,29 @@ const WS_URL = `ws://${process.env.NEXT_PUBLIC_API_HOST}:${process.env.NEXT_PUBL
 
 export { WS_URL };
 
-export const getWsRoomUrl = (roomId) => `${WS_URL}/room/${roomId}`;
+// The worker the API assigned to the room, if any, keeps its sockets together
+export const getWsRoomUrl = (roomId, token, worker) =>
+  `${worker ? `${worker}/ws` : WS_URL}/room/${roomId}?token=${encodeURIComponent(token)}`;
+
+// Columnar JSON frames send the keys of vote lists once instead of per vote
+export const ROOM_SUBPROTOCOLS = ['poker.compact', 'poker.json'];
+
+const isColumns = (value) =>
+  value !== null &&
+  typeof value === 'object' &&
+  !Array.isArray(value) &&
+  Object.keys(value).length > 0 &&
+  Object.values(value).every(Array.isArray);
+
+// Turns the column lists of a compact frame back into lists of objects
+export const decodeFrame = (data) =>
+  Object.fromEntries(
+    Object.entries(data).map(([name, value]) => {
+      if (!isColumns(value)) return [name, value];
+      const keys = Object.keys(value);
+      const rows = value[keys[0]].map((_, index) =>
+        Object.fromEntries(keys.map((key) => [key, value[key][index]])),
+      );
+      return [name, rows];
+    }),
+  );